@@ -1,13 +1,17 @@
 """Compute mean volume"""
 
 import pandas as pd
+from marketdata import symbol_to_path
 
-def get_mean_volume(symbol):
+def get_mean_volume(symbol, index=None):
     """Return the mean volume for stock indicated by symbol.
     
-    Note: Data for a stock is stored in file: data/<symbol>.csv
+    Note: Data for a stock is stored in file: <data root>/<symbol>.csv (see marketdata.symbol_to_path)
+    If a symbol index (see marketdata/symbol_index.py) is given, the mean volume is read from it instead.
     """
-    df = pd.read_csv("../../data/{}.csv".format(symbol))  # read in data
+    if index is not None and symbol in index:
+        return index[symbol]["mean_volume"]
+    df = pd.read_csv(symbol_to_path(symbol))  # read in data
     # TODO: Compute and return the mean volume for this stock
     return df['Volume'].mean()
 
@@ -0,0 +1,47 @@
+"""Benchmark the vectorized indicators over a synthetic universe of 1,000 symbols x 20 years"""
+
+import time
+import numpy as np
+import pandas as pd
+from indicators import *
+
+
+def time_it(label, func, *args, **kwargs):
+    """Run func once and print how long it took"""
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    print ("{:<28}{:>10.1f} ms".format(label, (time.perf_counter() - start) * 1000))
+
+
+def test_run(n_symbols=1000, n_years=20):
+    # Random walk prices for every symbol, 252 trading days per year
+    rng = np.random.RandomState(0)
+    prices = 100 * np.cumprod(1 + rng.normal(0.0003, 0.02, (252 * n_years, n_symbols)), axis=0)
+    print ("Prices: {} days x {} symbols".format(*prices.shape))
+
+    time_it("SMA(20)", sma, prices, 20)
+    time_it("EMA(20)", ema, prices, 20)
+    time_it("Bollinger %B(20)", bollinger_percent_b, prices, 20)
+    time_it("Momentum(20)", momentum, prices, 20)
+    time_it("RSI(14)", rsi, prices, 14)
+    time_it("Rolling volatility(20)", rolling_volatility, prices, 20)
+
+    # Same Bollinger %B with pandas rolling windows, for comparison
+    df = pd.DataFrame(prices)
+    def pandas_percent_b(df, window=20):
+        rm, rstd = df.rolling(window).mean(), df.rolling(window).std()
+        return (df - (rm - 2 * rstd)) / (4 * rstd)
+    time_it("Bollinger %B(20), pandas", pandas_percent_b, df)
+
+    # Streaming: one new bar for every symbol
+    stream = IndicatorStream(n_symbols)
+    stream.prime(prices[-60:-1])
+    start = time.perf_counter()
+    n_bars = 1000
+    for i in range(n_bars):
+        stream.update(prices[-1])
+    print ("{:<28}{:>10.3f} ms per bar".format("Streaming update", (time.perf_counter() - start) * 1000 / n_bars))
+
+
+if __name__ == "__main__":
+    test_run()
@@ -0,0 +1,173 @@
+"""Technical indicators computed for every symbol of a price panel at once
+
+Every function takes prices as a 2D array of shape (days, symbols), or a dataframe with one
+column per symbol, and returns an array of the same shape; rows without enough history are NaN.
+Prices are expected to be filled (see fill_missing_values in 05 incomplete_data).
+"""
+
+import numpy as np
+from scipy.signal import lfilter
+
+
+def sma(prices, window=20):
+    """Simple moving average over the last window days"""
+    return _rolling_sum(_as_array(prices), window) / window
+
+
+def rolling_std(prices, window=20):
+    """Rolling sample standard deviation over the last window days, like pandas rolling().std()"""
+    return _rolling_mean_std(_as_array(prices), window)[1]
+
+
+def ema(prices, span=20):
+    """Exponential moving average with alpha = 2 / (span + 1), like pandas ewm(span, adjust=False)"""
+    return _exponential_smoothing(_as_array(prices), 2.0 / (span + 1))
+
+
+def bollinger_bands(prices, window=20, k=2):
+    """Return rolling mean, upper and lower Bollinger Bands at k standard deviations"""
+    rm, rstd = _rolling_mean_std(_as_array(prices), window)
+    return rm, rm + k * rstd, rm - k * rstd
+
+
+def bollinger_percent_b(prices, window=20, k=2):
+    """Position of the price within its Bollinger Bands: 0 at the lower band, 1 at the upper band"""
+    prices = _as_array(prices)
+    rm, upper, lower = bollinger_bands(prices, window, k)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (prices - lower) / (upper - lower)
+
+
+def momentum(prices, window=20):
+    """Return over the last window days: price[t] / price[t - window] - 1"""
+    prices = _as_array(prices)
+    result = np.full(prices.shape, np.nan)
+    result[window:] = prices[window:] / prices[:-window] - 1
+    return result
+
+
+def rsi(prices, window=14):
+    """Relative Strength Index with Wilder's smoothing of gains and losses (alpha = 1 / window)"""
+    prices = _as_array(prices)
+    changes = np.diff(prices, axis=0)
+    avg_gain = _exponential_smoothing(np.maximum(changes, 0), 1.0 / window)
+    avg_loss = _exponential_smoothing(np.maximum(-changes, 0), 1.0 / window)
+    result = np.full(prices.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result[1:] = 100 - 100 / (1 + avg_gain / avg_loss)
+    result[1:][avg_loss == 0] = 100
+    return result
+
+
+def rolling_volatility(prices, window=20, samples_per_year=None):
+    """Rolling standard deviation of daily returns, annualized if samples_per_year is given"""
+    prices = _as_array(prices)
+    result = np.full(prices.shape, np.nan)
+    result[1:] = rolling_std(prices[1:] / prices[:-1] - 1, window)
+    if samples_per_year is not None:
+        result *= np.sqrt(samples_per_year)
+    return result
+
+
+class IndicatorStream(object):
+    """
+    Update indicators for every symbol one bar at a time, e.g. as new daily prices arrive
+    After each update, the latest values match the last row of the batch functions over the full history.
+    """
+
+    def __init__(self, n_symbols, window=20, k=2, ema_span=20, rsi_window=14, momentum_window=20):
+        self.window, self.k = window, k
+        self.ema_alpha = 2.0 / (ema_span + 1)
+        self.rsi_alpha = 1.0 / rsi_window
+        self.momentum_window = momentum_window
+        # Ring buffers of the most recent prices and daily returns
+        self._prices = np.full((max(window, momentum_window + 1), n_symbols), np.nan)
+        self._returns = np.full((window, n_symbols), np.nan)
+        self.n_bars = 0
+        self._ema = self._avg_gain = self._avg_loss = None
+
+    def prime(self, prices):
+        """Feed a history of prices, oldest first; returns the latest indicators"""
+        for bar in _as_array(prices):
+            latest = self.update(bar)
+        return latest
+
+    def update(self, bar):
+        """Add one bar of prices (one per symbol) and return a dict of the latest indicators"""
+        bar = np.asarray(bar, dtype=np.float64)
+        previous = self._prices[(self.n_bars - 1) % len(self._prices)] if self.n_bars else None
+        self._prices[self.n_bars % len(self._prices)] = bar
+
+        if previous is None:
+            self._ema = bar.copy()
+        else:
+            self._ema += self.ema_alpha * (bar - self._ema)
+            change = bar - previous
+            gain, loss = np.maximum(change, 0), np.maximum(-change, 0)
+            if self._avg_gain is None:
+                self._avg_gain, self._avg_loss = gain, loss
+            else:
+                self._avg_gain += self.rsi_alpha * (gain - self._avg_gain)
+                self._avg_loss += self.rsi_alpha * (loss - self._avg_loss)
+            self._returns[(self.n_bars - 1) % self.window] = bar / previous - 1
+        self.n_bars += 1
+
+        nan = np.full(bar.shape, np.nan)
+        latest = {"ema": self._ema.copy(), "sma": nan, "bollinger_percent_b": nan, "momentum": nan, \
+            "rsi": nan, "volatility": nan}
+        if self.n_bars >= self.window:
+            recent = self._recent(self._prices, self.window)
+            rm, rstd = recent.mean(axis=0), recent.std(axis=0, ddof=1)
+            latest["sma"] = rm
+            with np.errstate(divide='ignore', invalid='ignore'):
+                latest["bollinger_percent_b"] = (bar - (rm - self.k * rstd)) / (2 * self.k * rstd)
+        if self.n_bars > self.momentum_window:
+            latest["momentum"] = bar / self._recent(self._prices, self.momentum_window + 1)[0] - 1
+        if self._avg_gain is not None:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                latest["rsi"] = np.where(self._avg_loss == 0, 100, 100 - 100 / (1 + self._avg_gain / self._avg_loss))
+        if self.n_bars > self.window:
+            latest["volatility"] = self._returns.std(axis=0, ddof=1)
+        return latest
+
+    def _recent(self, buffer, n):
+        """Return the last n rows written to a price ring buffer, oldest first"""
+        end = self.n_bars % len(buffer)
+        return np.roll(buffer, -end, axis=0)[-n:]
+
+
+def _rolling_sum(values, window):
+    """Sum over the last window rows for every column, from one cumulative sum"""
+    result = np.full(values.shape, np.nan)
+    if len(values) < window:
+        return result
+    csum = np.cumsum(values, axis=0)
+    result[window - 1] = csum[window - 1]
+    np.subtract(csum[window:], csum[:-window], out=result[window:])
+    return result
+
+
+def _rolling_mean_std(values, window):
+    """Rolling mean and sample standard deviation from cumulative sums of values and squares"""
+    # Shifting by the first row keeps the sums of squares small and the result accurate
+    centered = values - values[:1]
+    mean = _rolling_sum(centered, window)
+    mean /= window
+    var = _rolling_sum(np.square(centered, out=centered), window)
+    var /= window
+    var -= np.square(mean)
+    np.maximum(var, 0, out=var)
+    var *= window / (window - 1.0)
+    mean += values[:1]
+    return mean, np.sqrt(var, out=var)
+
+
+def _exponential_smoothing(values, alpha):
+    """y[0] = x[0], y[t] = alpha * x[t] + (1 - alpha) * y[t - 1], along the time axis for every column"""
+    if len(values) == 0:
+        return values
+    return lfilter([alpha], [1, alpha - 1], values, axis=0, zi=(1 - alpha) * values[:1])[0]
+
+
+def _as_array(prices):
+    return np.asarray(prices, dtype=np.float64)
@@ -1,33 +1,8 @@
 """Stat analysis for time series"""
 
-import os
 import pandas as pd
 import matplotlib.pyplot as plt
-
-def symbol_to_path(symbol, base_dir="../../data"):
-    """Return CSV file path given ticker symbol."""
-    return os.path.join(base_dir, "{}.csv".format(str(symbol)))
-
-
-def get_data(symbols, dates):
-    """Read stock data (adjusted close) for given symbols from CSV files."""
-    df = pd.DataFrame(index=dates)
-    if 'SPY' not in symbols:  # add SPY for reference, if absent
-        symbols.insert(0, 'SPY')
-
-    # Read and join data for each symbol
-    for symbol in symbols:
-        df_temp = pd.read_csv(symbol_to_path(symbol), index_col='Date', 
-        parse_dates=True, usecols=['Date', 'Adj Close'], na_values=['nan'])
-        
-        # Rename to 'Adj Close' for each symbol to prevent clash
-        df_temp = df_temp.rename(columns={'Adj Close': symbol})
-        
-        df = df.join(df_temp)
-        if symbol == 'SPY': # drop dates SPY didn't trade
-            df = df.dropna(subset=['SPY'])
-
-    return df
+from marketdata import symbol_to_path, get_data, compute_daily_returns, plot_data
 
 
 def get_bollinger_bands(rm, rstd):
@@ -42,21 +17,6 @@ def get_bollinger_bands(rm, rstd):
     return upper_band, lower_band    
 
 
-def compute_daily_returns(df):
-    """Compute and return the daily return values"""
-    daily_returns = df.pct_change()
-    daily_returns.iloc[0,:] = 0
-    return daily_returns
-
-
-def plot_data(df, title="Stock prices", xlabel="Date", ylabel="Price"):
-    """Plot stock prices with a custom title and meaningful axis labels."""
-    ax = df.plot(title=title, fontsize=12)
-    ax.set_xlabel("Date")
-    ax.set_ylabel("Price")
-    plt.show()
-
-
 def test_run():
     # Define a date range
     dates = pd.date_range('2012-01-01', '2012-12-31')
@@ -0,0 +1,56 @@
+"""Test for indicators.py"""
+
+
+import pandas as pd
+from indicators import *
+import unittest
+
+
+class TestIndicators(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.prices = pd.DataFrame(100 * np.cumprod(1 + rng.normal(0.0003, 0.02, (300, 5)), axis=0))
+
+    def assertMatches(self, actual, expected):
+        self.assertEqual(actual.shape, expected.shape)
+        self.assertTrue(np.allclose(actual, expected, equal_nan=True, rtol=1e-8, atol=1e-10))
+
+    def test_batch_matches_pandas(self):
+        prices = self.prices
+        rm, rstd = prices.rolling(20).mean(), prices.rolling(20).std()
+        self.assertMatches(sma(prices, 20), rm.values)
+        self.assertMatches(rolling_std(prices, 20), rstd.values)
+        self.assertMatches(ema(prices, 10), prices.ewm(span=10, adjust=False).mean().values)
+        self.assertMatches(bollinger_percent_b(prices, 20), ((prices - (rm - 2 * rstd)) / (4 * rstd)).values)
+        self.assertMatches(momentum(prices, 5), (prices / prices.shift(5) - 1).values)
+        self.assertMatches(rolling_volatility(prices, 20), prices.pct_change().rolling(20).std().values)
+
+        changes = prices.diff()
+        avg_gain = changes.clip(lower=0).iloc[1:].ewm(alpha=1.0 / 14, adjust=False).mean()
+        avg_loss = (-changes).clip(lower=0).iloc[1:].ewm(alpha=1.0 / 14, adjust=False).mean()
+        self.assertMatches(rsi(prices, 14)[1:], (100 - 100 / (1 + avg_gain / avg_loss)).values)
+
+    def test_stream_matches_batch(self):
+        prices = self.prices.values
+        stream = IndicatorStream(prices.shape[1], window=20, ema_span=10, rsi_window=14, momentum_window=5)
+        stream.prime(prices[:-1])
+        latest = stream.update(prices[-1])
+
+        self.assertMatches(latest["sma"], sma(prices, 20)[-1])
+        self.assertMatches(latest["ema"], ema(prices, 10)[-1])
+        self.assertMatches(latest["bollinger_percent_b"], bollinger_percent_b(prices, 20)[-1])
+        self.assertMatches(latest["momentum"], momentum(prices, 5)[-1])
+        self.assertMatches(latest["rsi"], rsi(prices, 14)[-1])
+        self.assertMatches(latest["volatility"], rolling_volatility(prices, 20)[-1])
+
+    def test_stream_warm_up(self):
+        stream = IndicatorStream(5, window=20)
+        latest = stream.prime(self.prices.values[:19])
+        self.assertTrue(np.isnan(latest["sma"]).all())
+        latest = stream.update(self.prices.values[19])
+        self.assertMatches(latest["sma"], sma(self.prices, 20)[19])
+
+
+if __name__ == '__main__':
+    unittest.main()
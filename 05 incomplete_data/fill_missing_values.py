@@ -1,35 +1,9 @@
 """Fill missing values"""
 
-import os
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
-
-
-def symbol_to_path(symbol, base_dir="../../data"):
-    """Return CSV file path given ticker symbol."""
-    return os.path.join(base_dir, "{}.csv".format(str(symbol)))
-
-
-def get_data(symbols, dates):
-    """Read stock data (adjusted close) for given symbols from CSV files."""
-    df = pd.DataFrame(index=dates)
-    if 'SPY' not in symbols:  # add SPY for reference, if absent
-        symbols.insert(0, 'SPY')
-
-    # Read and join data for each symbol
-    for symbol in symbols:
-        df_temp = pd.read_csv(symbol_to_path(symbol), index_col='Date', 
-        parse_dates=True, usecols=['Date', 'Adj Close'], na_values=['nan'])
-        
-        # Rename to 'Adj Close' for each symbol to prevent clash
-        df_temp = df_temp.rename(columns={'Adj Close': symbol})
-        
-        df = df.join(df_temp)
-        if symbol == 'SPY': # drop dates SPY didn't trade
-            df = df.dropna(subset=['SPY'])
-
-    return df
+from marketdata import symbol_to_path, get_data, plot_data
 
 
 def fill_missing_values(df_data):
@@ -39,14 +13,6 @@ def fill_missing_values(df_data):
     return df_data
 
 
-def plot_data(df_data):
-    """Plot stock data with appropriate axis labels."""
-    ax = df_data.plot(title="Stock Data", fontsize=2)
-    ax.set_xlabel("Date")
-    ax.set_ylabel("Price")
-    plt.show()
-
-
 def test_run():
     """Function called by Test Run."""
     # Read data
@@ -60,7 +26,7 @@ def test_run():
     fill_missing_values(df_data)
 
     # Plot
-    plot_data(df_data)
+    plot_data(df_data, title="Stock Data")
 
 
 if __name__ == "__main__":
@@ -1,41 +1,9 @@
 """Histograms and scatter plots"""
 
-import os
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
-
-def symbol_to_path(symbol, base_dir="../../data"):
-    """Return CSV file path given ticker symbol."""
-    return os.path.join(base_dir, "{}.csv".format(str(symbol)))
-
-
-def get_data(symbols, dates):
-    """Read stock data (adjusted close) for given symbols from CSV files."""
-    df = pd.DataFrame(index=dates)
-    if "SPY" not in symbols:  # add SPY for reference, if absent
-        symbols.insert(0, "SPY")
-
-    # Read and join data for each symbol
-    for symbol in symbols:
-        df_temp = pd.read_csv(symbol_to_path(symbol), index_col="Date", 
-        parse_dates=True, usecols=["Date", "Adj Close"], na_values=["nan"])
-        
-        # Rename to "Adj Close" for each symbol to prevent clash
-        df_temp = df_temp.rename(columns={"Adj Close": symbol})
-        
-        df = df.join(df_temp)
-        if symbol == "SPY": # drop dates SPY didn"t trade
-            df = df.dropna(subset=["SPY"])
-
-    return df
-
-
-def compute_daily_returns(df):
-    """Compute and return the daily return values"""
-    daily_returns = df.pct_change()
-    daily_returns.iloc[0,:] = 0
-    return daily_returns
+from marketdata import symbol_to_path, get_data, compute_daily_returns
 
 
 def test_run():
@@ -21,25 +21,39 @@ def error_line(coefficients, data):
 	return err
 
 
-def fit_line(data, error_func):
+def error_line_gradient(coefficients, data):
+	"""Compute the gradient of error_line with respect to the coefficients (m, b)
+
+	Returns array [d(err)/dm, d(err)/db]
+	"""
+
+	residuals = data[:, 1] - (coefficients[0] * data[:, 0] + coefficients[1])
+	return np.array([-2 * np.sum(residuals * data[:, 0]), -2 * np.sum(residuals)])
+
+
+def fit_line(data, error_func, jac=None):
 	"""Fit a line to given data, using a supplied error function.
 	
 	Parameters:
 	data: 2D array where each row is a point (x, y)
 	error_func: function that computes the error between a line and observed data
+	jac: function that computes the gradient of error_func, used by SLSQP instead of finite differences;
+	defaults to error_line_gradient when error_func is error_line
 
 	Returns line that minimizes the error function
 	"""
 	
 	# Generate initial guess for line model
-	l = np.float32([0, np.mean(data[:, 1])]) # m = 0, b = mean of the data
+	l = np.float64([0, np.mean(data[:, 1])]) # m = 0, b = mean of the data
 
 	# Plot initial guess
 	x_initial_guess = np.float32([-5, 5])
 	plt.plot(x_initial_guess, l[0] * x_initial_guess + l[1], "m--", linewidth=2.0, label="Initial guess")
 
 	# Call optimizer to minimize error function
-	result = spo.minimize(error_func, l, args=(data,), method="SLSQP", options={"disp": True}) # args: used to pass data to error_func
+	if jac is None and error_func is error_line:
+		jac = error_line_gradient
+	result = spo.minimize(error_func, l, args=(data,), method="SLSQP", jac=jac, options={"disp": True}) # args: used to pass data to error_func
 	return result.x
 
 
@@ -58,28 +72,97 @@ def error_poly(coefficients, data):
 	return err
 
 
-def fit_poly(data, error_func, degree=3):
+def error_poly_gradient(coefficients, data):
+	"""Compute the gradient of error_poly with respect to the polynomial coefficients
+
+	Returns array of partial derivatives, highest power first like the coefficients
+	"""
+
+	vander = np.vander(data[:, 0], len(coefficients))
+	residuals = data[:, 1] - np.dot(vander, coefficients)
+	return -2 * np.dot(vander.T, residuals)
+
+
+def fit_poly(data, error_func, degree=3, jac=None):
 	"""Fit a polynomial to given data, using a supplied error function.
 	
 	Parameters:
 	data: 2D array where each row is a point (x, y)
 	error_func: function that computes the error between a polynomial and observed data
+	jac: function that computes the gradient of error_func, used by SLSQP instead of finite differences;
+	defaults to error_poly_gradient when error_func is error_poly
 
 	Returns polynomial that minimizes the error function
 	"""
 
 	# Generate initial guess for polynomial model
-	poly_guess = np.poly1d(np.ones(degree + 1, dtype=np.float32))
+	poly_guess = np.poly1d(np.ones(degree + 1, dtype=np.float64))
 
 	# Plot initial guess
 	x_initial_guess = np.linspace(-5, 5, 21)
 	plt.plot(x_initial_guess, np.polyval(poly_guess, x_initial_guess), "m--", linewidth=2.0, label="Initial guess")
 
 	# Call optimizer to minimize error function
-	result = spo.minimize(error_func, poly_guess, args=(data,), method="SLSQP", options={"disp": True}) # args: used to pass data to error_func
+	if jac is None and error_func is error_poly:
+		jac = error_poly_gradient
+	result = spo.minimize(error_func, poly_guess, args=(data,), method="SLSQP", jac=jac, options={"disp": True}) # args: used to pass data to error_func
 	return np.poly1d(result.x)
 
 
+def fit_line_lstsq(data):
+	"""Fit a line to given data in closed form, minimizing the same squared error as error_line
+
+	Parameters:
+	data: 2D array where each row is a point (x, y)
+
+	Returns line coefficients (m, b)
+	"""
+
+	return fit_poly_batch(data[:, 0], data[:, 1][np.newaxis, :], degree=1)[0]
+
+
+def fit_poly_lstsq(data, degree=3):
+	"""Fit a polynomial to given data in closed form, minimizing the same squared error as error_poly
+
+	Parameters:
+	data: 2D array where each row is a point (x, y)
+	degree: degree of the polynomial
+
+	Returns polynomial that minimizes the squared error
+	"""
+
+	return np.poly1d(fit_poly_batch(data[:, 0], data[:, 1][np.newaxis, :], degree=degree)[0])
+
+
+def fit_poly_batch(x, Y, degree=1):
+	"""Fit one least-squares polynomial per series, for many independent series at once
+
+	Parameters:
+	x: 1D array of n points shared by all series (e.g. trading days), or 2D array (K, n) with one row per series
+	Y: 2D array (K, n), one series per row (e.g. prices of K symbols)
+	degree: degree of the polynomials, 1 for trend lines
+
+	Returns 2D array (K, degree + 1) of coefficients, highest power first like np.polyval
+	"""
+
+	x = np.asarray(x, dtype=np.float64)
+	Y = np.asarray(Y, dtype=np.float64)
+
+	# Vandermonde matrices of shape (1 or K, n, degree + 1); a shared x is broadcast over the series
+	vander = np.atleast_2d(x)[:, :, np.newaxis] ** np.arange(degree, -1, -1)
+
+	# Scale the columns to unit norm like np.polyfit, so that badly scaled x (e.g. date ordinals)
+	# do not make the solve lose the small coefficients
+	scale = np.sqrt(np.sum(vander * vander, axis=1, keepdims=True))
+	scale[scale == 0] = 1
+	q, r = np.linalg.qr(vander / scale)
+
+	# Least squares through QR, for every series at once: R c = Q'y
+	qty = np.matmul(np.swapaxes(q, 1, 2), Y[:, :, np.newaxis])
+	coeffs = np.linalg.solve(r, qty)[:, :, 0]
+	return coeffs / scale[:, 0, :]
+
+
 def test_run():
     """Build a line model"""
     # Define original line
@@ -98,6 +181,8 @@ def test_run():
     # Try to fit a line to this data
     l_fit = fit_line(data, error_line)
     print ("Fitted line: m = {}, b = {}".format(l_fit[0], l_fit[1]))
+    l_lstsq = fit_line_lstsq(data)
+    print ("Closed-form line: m = {}, b = {}".format(l_lstsq[0], l_lstsq[1]))
     plt.plot(data[:, 0], l_fit[0] * data[:, 0] + l_fit[1], "r--", linewidth=2.0, label="Fitted line")
 
     # Add a legend and show plot
@@ -0,0 +1,54 @@
+"""Test for parameterized_model.py"""
+
+
+from parameterized_model import *
+import unittest
+
+
+class TestFitting(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.x = np.linspace(-5, 5, 41)
+        self.poly_orig = np.poly1d([1.5, -10, -5, 60, 50])
+        self.data = np.asarray([self.x, np.polyval(self.poly_orig, self.x) + rng.normal(0, 3, self.x.shape)]).T
+
+    def test_analytic_gradients(self):
+        coefficients = np.array([0.5, -1.0, 2.0, 0.3, 1.0])
+        eps = 1e-6
+        for error, gradient, c in [(error_line, error_line_gradient, coefficients[:2]), (error_poly, error_poly_gradient, coefficients)]:
+            numeric = [(error(c + eps * e, self.data) - error(c - eps * e, self.data)) / (2 * eps) for e in np.eye(len(c))]
+            self.assertTrue(np.allclose(gradient(c, self.data), numeric, rtol=1e-5))
+
+    def test_closed_form_matches_polyfit(self):
+        self.assertTrue(np.allclose(fit_line_lstsq(self.data), np.polyfit(self.x, self.data[:, 1], 1)))
+        self.assertTrue(np.allclose(fit_poly_lstsq(self.data, degree=4).coeffs, np.polyfit(self.x, self.data[:, 1], 4)))
+
+    def test_closed_form_matches_slsqp(self):
+        l_fit = fit_line(self.data, error_line)
+        self.assertTrue(np.allclose(fit_line_lstsq(self.data), l_fit, rtol=1e-3))
+
+    def test_batch(self):
+        rng = np.random.RandomState(1)
+        Y = rng.normal(0, 1, (100, len(self.x))).cumsum(axis=1)
+        shared = fit_poly_batch(self.x, Y, degree=2)
+        per_series = fit_poly_batch(np.tile(self.x, (100, 1)), Y, degree=2)
+        for k in [0, 42, 99]:
+            self.assertTrue(np.allclose(shared[k], np.polyfit(self.x, Y[k], 2)))
+        self.assertTrue(np.allclose(per_series, shared))
+
+    def test_batch_date_ordinals(self):
+        # Per-symbol trend lines over trading days: x is badly scaled
+        rng = np.random.RandomState(2)
+        x = np.arange(730000, 735000, 7, dtype=np.float64)
+        Y = 100 + rng.normal(0, 1, (20, len(x))).cumsum(axis=1)
+        shared = fit_poly_batch(x, Y, degree=2)
+        per_series = fit_poly_batch(np.tile(x, (20, 1)), Y, degree=2)
+        for k in range(20):
+            reference = np.polyfit(x, Y[k], 2)
+            self.assertTrue(np.allclose(shared[k], reference, rtol=1e-6, atol=0))
+            self.assertTrue(np.allclose(per_series[k], reference, rtol=1e-6, atol=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
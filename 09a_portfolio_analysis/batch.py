@@ -0,0 +1,170 @@
+"""Assess many portfolios from a spec file
+
+Usage:
+python batch.py <spec.json|spec.csv> -o <results.csv|results.jsonl> [--workers N] [--chunk-size N]
+
+A JSON spec is a list of portfolios (or {"portfolios": [...]}), each an object with keys
+sd, ed, syms, allocs and optionally id, sv, rfr, sf. A CSV spec has the same columns, with
+syms and allocs separated by semicolons, e.g. "GOOG;AAPL" and "0.6;0.4".
+"""
+
+import argparse
+import csv
+import json
+import time
+from collections import OrderedDict
+from analysis import *
+from marketdata.shared_prices import attach_prices, detach_prices
+from scheduler import run_grouped
+
+RESULT_FIELDS = ["id", "sd", "ed", "syms", "allocs", "cr", "adr", "sddr", "sr", "ev", "latency_ms", "error"]
+
+
+def read_spec(path):
+    """Read portfolios from a JSON or CSV spec file and fill in assess_portfolio defaults"""
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        for row in rows:
+            row["syms"] = [s.strip() for s in row["syms"].split(";") if s.strip()]
+            row["allocs"] = [float(a) for a in row["allocs"].split(";") if a.strip()]
+            for key in ["sv", "rfr", "sf"]:
+                if row.get(key) in ("", None):
+                    row.pop(key, None)
+    else:
+        with open(path) as f:
+            rows = json.load(f)
+        if isinstance(rows, dict):
+            rows = rows["portfolios"]
+
+    jobs = []
+    for i, row in enumerate(rows):
+        jobs.append({"id": str(row.get("id") or i),
+            "sd": pd.Timestamp(row["sd"]), "ed": pd.Timestamp(row["ed"]),
+            "syms": list(row["syms"]), "allocs": [float(a) for a in row["allocs"]],
+            "sv": float(row.get("sv", 1000000)), "rfr": float(row.get("rfr", 0.0)),
+            "sf": float(row.get("sf", 252.0))})
+    return jobs
+
+
+def group_jobs(jobs):
+    """Group jobs by date range; each group needs one price load for the union of its symbols"""
+    groups = OrderedDict()
+    for job in jobs:
+        groups.setdefault((job["sd"], job["ed"]), []).append(job)
+    return groups
+
+
+def assess_jobs(handle, jobs):
+    """Worker task: assess jobs against the shared prices of their group
+
+    Returns one result row per job; a failing job records its error instead of raising.
+    """
+    prices_all = attach_prices(handle)
+    try:
+        return [assess_job(prices_all, job) for job in jobs]
+    finally:
+        del prices_all
+        detach_prices(handle)
+
+
+def assess_job(prices_all, job):
+    """Assess one job with the assess_portfolio math and time it"""
+    row = result_row(job)
+    start = time.perf_counter()
+    try:
+        port_val = get_portfolio_value(prices_all[job["syms"]], job["allocs"], job["sv"])
+        row["cr"], row["adr"], row["sddr"], row["sr"] = get_portfolio_stats(port_val, job["rfr"], job["sf"])
+        row["ev"] = port_val.iloc[-1, 0]
+    except Exception as e:
+        row["error"] = repr(e)
+    row["latency_ms"] = (time.perf_counter() - start) * 1000
+    return row
+
+
+def result_row(job, error=""):
+    """Create an empty result row for a job"""
+    row = dict.fromkeys(RESULT_FIELDS)
+    row.update({"id": job["id"], "sd": job["sd"].date().isoformat(), "ed": job["ed"].date().isoformat(),
+        "syms": ";".join(job["syms"]), "allocs": ";".join(str(a) for a in job["allocs"]), "error": error})
+    return row
+
+
+def run_batch(jobs, output_path, n_workers=None, chunk_size=256, loader=get_data, max_groups_in_flight=2):
+    """Assess jobs in parallel and stream the results to output_path
+
+    Parameters:
+    jobs: A list of jobs, as returned by read_spec
+    output_path: Results file, JSON lines if it ends with .jsonl or .json, CSV otherwise
+    n_workers: Number of worker processes, defaults to the number of CPUs
+    chunk_size: Maximum number of jobs per worker task
+    loader: Function (symbols, dates) -> prices, called once per group (and per symbol if that fails)
+    max_groups_in_flight: Maximum number of groups whose prices are held in shared memory at once
+
+    Returns:
+    summary: A dict with job counts, wall time, throughput and per-job latency statistics
+    """
+    start = time.perf_counter()
+    latencies = []
+    groups = group_jobs(jobs)
+    items = ((pd.date_range(sd, ed), [(job["syms"], job) for job in group]) for (sd, ed), group in groups.items())
+
+    with open(output_path, "w", newline="") as out:
+        write = _result_writer(out, output_path)
+        for chunk, rows, error in run_grouped(items, loader, assess_jobs, n_workers=n_workers, \
+            chunk_size=chunk_size, max_groups_in_flight=max_groups_in_flight):
+            if rows is None:
+                rows = [result_row(job, error=error) for job in chunk]
+            for row in rows:
+                write(row)
+                if not row["error"]:
+                    latencies.append(row["latency_ms"])
+            out.flush()
+
+    wall = time.perf_counter() - start
+    latencies = np.array(latencies)
+    n_done = len(latencies)
+    return {"n_jobs": len(jobs), "n_groups": len(groups), "n_succeeded": n_done, "n_failed": len(jobs) - n_done,
+        "wall_s": wall, "jobs_per_s": len(jobs) / wall if wall > 0 else float("inf"),
+        "latency_ms_mean": latencies.mean() if n_done else float("nan"),
+        "latency_ms_p50": np.percentile(latencies, 50) if n_done else float("nan"),
+        "latency_ms_p95": np.percentile(latencies, 95) if n_done else float("nan"),
+        "latency_ms_p99": np.percentile(latencies, 99) if n_done else float("nan"),
+        "latency_ms_max": latencies.max() if n_done else float("nan")}
+
+
+def _result_writer(out, output_path):
+    """Return a function that writes one result row to out, as JSON lines or CSV"""
+    if output_path.endswith((".jsonl", ".json")):
+        def write(row):
+            out.write(json.dumps({k: (float(v) if isinstance(v, np.floating) else v) for k, v in row.items()}) + "\n")
+        return write
+    writer = csv.DictWriter(out, fieldnames=RESULT_FIELDS)
+    writer.writeheader()
+    return writer.writerow
+
+
+def format_summary(summary):
+    """Format a run_batch summary for printing"""
+    return "\n".join([
+        "Jobs: {n_jobs} in {n_groups} groups ({n_succeeded} succeeded, {n_failed} failed)",
+        "Wall time: {wall_s:.3f} s",
+        "Throughput: {jobs_per_s:.1f} jobs/s",
+        "Latency (ms): mean {latency_ms_mean:.3f}, p50 {latency_ms_p50:.3f}, p95 {latency_ms_p95:.3f}, "
+        "p99 {latency_ms_p99:.3f}, max {latency_ms_max:.3f}"]).format(**summary)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Assess many portfolios from a spec file")
+    parser.add_argument("spec", help="JSON or CSV file of portfolios")
+    parser.add_argument("-o", "--output", default="results.csv", help="results file (.csv or .jsonl)")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=256, help="maximum number of jobs per worker task")
+    args = parser.parse_args(argv)
+
+    summary = run_batch(read_spec(args.spec), args.output, n_workers=args.workers, chunk_size=args.chunk_size)
+    print (format_summary(summary))
+
+
+if __name__ == "__main__":
+    main()
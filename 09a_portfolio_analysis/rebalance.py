@@ -0,0 +1,155 @@
+"""Simulate a portfolio that is rebalanced to its target allocations, with trading costs"""
+
+from analysis import *
+
+
+def simulate_portfolio(prices, allocs, sv=1000000, rebalance=None, freq="M", threshold=0.05, \
+    commission=0.0, commission_rate=0.0, slippage=0.0, lot_size=None):
+
+    """Simulate a rebalanced portfolio and compute its daily value
+
+    Parameters:
+    prices: Adjusted closing prices for portfolio symbols
+    allocs: A list of target allocations to the stocks, must sum to 1.0
+    sv: Start value of the portfolio, in cash before the first trades
+    rebalance: None to buy and hold, "calendar" to rebalance on the first trading day of every
+        period given by freq, or "threshold" to rebalance when any allocation drifts from its target
+        by more than threshold
+    freq: Rebalancing period, a pandas period alias ("W", "M", "Q", "Y") or a number of trading days
+    threshold: Maximum absolute drift of an allocation before a threshold rebalance
+    commission: Fixed cost per trade (per symbol traded)
+    commission_rate: Cost per trade as a fraction of the traded value
+    slippage: Execution price penalty as a fraction of the price, paid on buys and sells
+    lot_size: Shares are traded in multiples of lot_size; None allows fractional shares
+
+    Returns:
+    port_val: A dataframe object showing the portfolio value for each day
+    summary: A dict with the number of rebalances and trades, the total costs, and the turnover
+        (total traded value divided by the average portfolio value)
+    """
+    strategy = dict(allocs=allocs, sv=sv, rebalance=rebalance, freq=freq, threshold=threshold, \
+        commission=commission, commission_rate=commission_rate, slippage=slippage, lot_size=lot_size)
+    values, summary = _simulate(prices.values.astype(np.float64), prices.index, strategy)
+    port_val = pd.DataFrame(values, index=prices.index, columns=["port_val"])
+    return port_val, summary
+
+
+def simulate_strategies(prices, strategies, rfr=0.0, sf=252.0):
+    """Simulate many strategies over the same prices, e.g. a sweep of rebalancing periods
+
+    Each strategy is simulated on its own, one after the other, since its trades depend on its own
+    holdings; only the conversion of the prices to an array is shared. The statistics of all the
+    strategies are then computed together from their daily values.
+
+    Parameters:
+    prices: Adjusted closing prices for portfolio symbols
+    strategies: A list of dicts of simulate_portfolio keyword arguments; allocs is required
+    rfr: The risk free return per sample period
+    sf: Sampling frequency per year
+
+    Returns:
+    port_vals: A dataframe with the daily value of each strategy, one column per strategy
+    summary: A dataframe with one row per strategy: cr, adr, sddr, sr, ev, rebalances, trades, costs and turnover
+    """
+    values = prices.values.astype(np.float64)
+    port_vals = np.empty((len(prices), len(strategies)))
+    rows = []
+    for k, strategy in enumerate(strategies):
+        port_vals[:, k], row = _simulate(values, prices.index, strategy)
+        rows.append(row)
+
+    summary = pd.DataFrame(rows)
+    cr, adr, sddr, sr = compute_portfolio_stats(port_vals, rfr, sf)
+    summary.insert(0, "cr", cr)
+    summary.insert(1, "adr", adr)
+    summary.insert(2, "sddr", sddr)
+    summary.insert(3, "sr", sr)
+    summary.insert(4, "ev", port_vals[-1])
+    return pd.DataFrame(port_vals, index=prices.index), summary
+
+
+def get_rebalance_days(dates, freq):
+    """Return the indices of the first trading day of every period, or of every freq-th day if freq is a number"""
+    if isinstance(freq, (int, np.integer)):
+        return np.arange(0, len(dates), freq)
+    periods = pd.DatetimeIndex(dates).to_period(freq)
+    return np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+
+
+def _simulate(values, dates, strategy):
+    """Simulate one strategy; holdings are constant between rebalances, so each holding period
+    is valued with one matrix product over its dates"""
+    target = np.asarray(strategy["allocs"], dtype=np.float64)
+    rebalance = strategy.get("rebalance")
+    threshold = strategy.get("threshold", 0.05)
+    n_days = len(values)
+    if rebalance == "calendar":
+        calendar = get_rebalance_days(dates, strategy.get("freq", "M"))
+    elif rebalance not in (None, "threshold"):
+        raise ValueError("Unknown rebalance mode: {}".format(rebalance))
+
+    port_val = np.empty(n_days)
+    shares, cash = np.zeros(len(target)), float(strategy.get("sv", 1000000))
+    totals = {"rebalances": 0, "trades": 0, "costs": 0.0, "turnover": 0.0}
+    t = 0
+    while t < n_days:
+        shares, cash = _trade(shares, cash, values[t], target, strategy, totals)
+
+        # Find the next rebalancing day
+        if rebalance == "calendar":
+            i = np.searchsorted(calendar, t, side="right")
+            next_t = calendar[i] if i < len(calendar) else n_days
+        elif rebalance == "threshold":
+            next_t = _next_drift(values, t, shares, cash, target, threshold)
+        else:
+            next_t = n_days
+
+        port_val[t:next_t] = np.dot(values[t:next_t], shares) + cash
+        t = next_t
+    totals["turnover"] /= np.mean(port_val)
+    return port_val, totals
+
+
+def _next_drift(values, t, shares, cash, target, threshold, block=256):
+    """Return the first day after t on which an allocation drifts more than threshold, scanning in blocks"""
+    n_days = len(values)
+    start = t + 1
+    while start < n_days:
+        end = min(start + block, n_days)
+        positions = values[start:end] * shares
+        weights = positions / (positions.sum(axis=1) + cash)[:, np.newaxis]
+        breached = np.abs(weights - target).max(axis=1) > threshold
+        if breached.any():
+            return start + int(np.argmax(breached))
+        start = end
+    return n_days
+
+
+def _trade(shares, cash, prices, target, strategy, totals):
+    """Trade to the target allocations at the given prices, paying slippage and commissions"""
+    slippage = strategy.get("slippage", 0.0)
+    commission = strategy.get("commission", 0.0)
+    commission_rate = strategy.get("commission_rate", 0.0)
+    lot_size = strategy.get("lot_size")
+
+    value = np.dot(shares, prices) + cash
+    # Leave room for the costs of the trades so that cash does not go negative: the fixed commission
+    # of every symbol that may trade, then slippage and the commission rate on the executed prices
+    investable = max(value - commission * len(target), 0.0) / ((1 + slippage) * (1 + commission_rate))
+    new_shares = target * investable / prices
+    if lot_size:
+        new_shares = np.floor(new_shares / lot_size) * lot_size
+
+    trades = new_shares - shares
+    traded = trades != 0
+    exec_prices = prices * (1 + slippage * np.sign(trades))
+    traded_value = np.abs(trades) * prices
+    costs = commission * np.count_nonzero(traded) + commission_rate * np.sum(np.abs(trades) * exec_prices) \
+        + np.sum(np.abs(trades) * np.abs(exec_prices - prices))
+    cash -= np.dot(trades, prices) + costs
+
+    totals["rebalances"] += 1
+    totals["trades"] += int(np.count_nonzero(traded))
+    totals["costs"] += costs
+    totals["turnover"] += np.sum(traded_value)
+    return new_shares, cash
@@ -0,0 +1,97 @@
+"""Run tasks that share price loads across a process pool, for batch.py and sweep.py"""
+
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from marketdata.shared_prices import publish_prices
+
+
+def load_group_prices(loader, symbols, dates):
+    """Load the prices of a group's symbols; if the load fails, find the symbols that fail on their own
+
+    Returns:
+    prices_all: Prices of the symbols that loaded, or None if nothing could be loaded
+    errors: A dict of symbol -> error for the symbols that could not be loaded; each error names
+        its symbol, since loader errors such as a missing file often do not
+    """
+    try:
+        return loader(symbols, dates), {}
+    except Exception as e:
+        group_error = e
+
+    errors = {}
+    for symbol in symbols:
+        try:
+            loader([symbol], dates)
+        except Exception as e:
+            errors[symbol] = "{}: {!r}".format(symbol, e)
+    good = [s for s in symbols if s not in errors]
+    if errors and good:
+        try:
+            return loader(good, dates), errors
+        except Exception as e:
+            group_error = e
+    # The failure does not come from individual symbols (or none are left): fail them all
+    return None, dict((s, errors.get(s, "{}: {!r}".format(";".join(symbols), group_error))) for s in symbols)
+
+
+def run_grouped(groups, loader, task, n_workers=None, chunk_size=1, max_groups_in_flight=2):
+    """Run task over items whose prices are loaded once per group, yielding results as they finish
+
+    Each group's prices are loaded for the union of its items' symbols and published into shared
+    memory; items are sent to task in chunks with the handle of the shared prices. Items that need
+    a symbol that failed to load are reported as failed on their own, without failing the group.
+    At most max_groups_in_flight groups are held in shared memory: the next group is only loaded
+    once the tasks of an earlier one have finished, so memory stays bounded and results stream.
+
+    Parameters:
+    groups: An iterable of (dates, items) pairs, where each item is a (symbols, payload) pair
+    loader: Function (symbols, dates) -> prices
+    task: Worker function task(handle, payloads) -> result, must be defined at module level
+    n_workers: Number of worker processes, defaults to the number of CPUs
+    chunk_size: Maximum number of payloads per task
+    max_groups_in_flight: Maximum number of groups whose prices are held at once
+
+    Yields:
+    (payloads, result, error): result of task on payloads, or None and the error of the load or task
+    """
+    pending = {}
+
+    def finish(futures):
+        for future in futures:
+            shared, payloads = pending.pop(future)
+            try:
+                result, error = future.result(), ""
+            except Exception as e:
+                result, error = None, repr(e)
+            shared.release()
+            yield payloads, result, error
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        for dates, items in groups:
+            symbols = sorted(set(s for item_symbols, _ in items for s in item_symbols))
+            prices_all, errors = load_group_prices(loader, symbols, dates)
+
+            payloads = []
+            for item_symbols, payload in items:
+                failed = [errors[s] for s in item_symbols if s in errors]
+                if failed:
+                    yield [payload], None, failed[0]
+                else:
+                    payloads.append(payload)
+
+            if payloads and prices_all is not None:
+                # The segment is released after the group's last task finishes
+                shared = publish_prices(prices_all)
+                for i in range(0, len(payloads), chunk_size):
+                    chunk = payloads[i:i + chunk_size]
+                    pending[executor.submit(task, shared.handle, chunk)] = (shared.retain(), chunk)
+                shared.release()
+            del prices_all
+
+            while len(set(shared.name for shared, _ in pending.values())) >= max_groups_in_flight:
+                for finished in finish(wait(pending, return_when=FIRST_COMPLETED).done):
+                    yield finished
+
+        while pending:
+            for finished in finish(wait(pending, return_when=FIRST_COMPLETED).done):
+                yield finished
+
@@ -0,0 +1,170 @@
+"""Sweep assess_portfolio over a grid of date windows, portfolios, risk free rates and sampling frequencies
+
+Usage:
+python sweep.py <grid.json> -o <results.csv> [--workers N]
+
+A grid file is an object with keys windows (a list of [sd, ed] pairs), portfolios (a list of
+objects with syms and optionally allocs; equal weights if allocs is missing) and optionally
+rfr, sf (lists of values) and sv. The results table has one row per cell of the
+Cartesian grid windows x portfolios x rfr x sf.
+"""
+
+import argparse
+import itertools
+import json
+import sys
+from collections import OrderedDict
+from analysis import *
+from marketdata.shared_prices import attach_prices, detach_prices
+from scheduler import run_grouped
+
+RESULT_COLUMNS = ["cell", "sd", "ed", "syms", "allocs", "sv", "rfr", "sf", "cr", "adr", "sddr", "sr", "ev", "error"]
+
+
+def build_grid(windows, portfolios, rfrs=(0.0,), sfs=(252.0,), sv=1000000):
+    """Build the Cartesian grid of sweep cells
+
+    Parameters:
+    windows: A list of (sd, ed) pairs
+    portfolios: A list of dicts with syms and optionally allocs, or plain lists of symbols (equal weights)
+    rfrs: Risk free returns per sample period
+    sfs: Sampling frequencies per year
+    sv: Start value of the portfolios
+
+    Returns:
+    cells: A list of dicts with cell, sd, ed, syms, allocs, sv, rfr and sf
+    """
+    cells = []
+    for (sd, ed), portfolio, rfr, sf in itertools.product(windows, portfolios, rfrs, sfs):
+        if not isinstance(portfolio, dict):
+            portfolio = {"syms": portfolio}
+        syms = list(portfolio["syms"])
+        allocs = portfolio.get("allocs") or [1.0 / len(syms)] * len(syms)
+        cells.append({"cell": len(cells), "sd": pd.Timestamp(sd), "ed": pd.Timestamp(ed), "syms": syms, \
+            "allocs": [float(a) for a in allocs], "sv": float(sv), "rfr": float(rfr), "sf": float(sf)})
+    return cells
+
+
+def group_cells(cells):
+    """Group cells into independent tasks: one per window and symbol set
+
+    Every cell of a task shares the same normalized prices; only allocations, rfr and sf differ.
+    Returns an OrderedDict of (sd, ed) -> OrderedDict of syms -> cells.
+    """
+    windows = OrderedDict()
+    for cell in cells:
+        windows.setdefault((cell["sd"], cell["ed"]), OrderedDict()).setdefault(tuple(cell["syms"]), []).append(cell)
+    return windows
+
+
+def assess_tasks(handle, tasks):
+    """Worker task: assess (syms, cells) tasks of one window against the shared prices"""
+    prices_all = attach_prices(handle)
+    try:
+        rows = []
+        for syms, cells in tasks:
+            try:
+                rows.extend(assess_cells(prices_all[list(syms)], cells))
+            except Exception as e:
+                rows.extend(result_row(cell, error=repr(e)) for cell in cells)
+        return rows
+    finally:
+        del prices_all
+        detach_prices(handle)
+
+
+def assess_cells(prices, cells):
+    """Assess cells that share a window and symbol set
+
+    The prices are normalized once, the values of every distinct allocation are computed in one
+    matrix product and the statistics of every (rfr, sf) pair are derived from the same returns.
+    """
+    norm_prices = normalize_data(prices).values
+
+    variants = sorted(set((tuple(cell["allocs"]), cell["sv"]) for cell in cells))
+    index = dict((variant, k) for k, variant in enumerate(variants))
+    allocs = np.array([variant[0] for variant in variants])
+    port_vals = compute_portfolio_values(norm_prices, allocs, np.array([variant[1] for variant in variants]))
+    cr, adr, sddr, _ = compute_portfolio_stats(port_vals)
+
+    rows = []
+    for cell in cells:
+        k = index[(tuple(cell["allocs"]), cell["sv"])]
+        row = result_row(cell)
+        row.update({"cr": cr[k], "adr": adr[k], "sddr": sddr[k], "ev": port_vals[-1, k], \
+            "sr": compute_sharpe_ratio(np.sqrt(cell["sf"]), adr[k], cell["rfr"], sddr[k])})
+        rows.append(row)
+    return rows
+
+
+def result_row(cell, error=""):
+    """Create an empty result row for a cell"""
+    row = dict.fromkeys(RESULT_COLUMNS)
+    row.update({"cell": cell["cell"], "sd": cell["sd"], "ed": cell["ed"], "syms": ";".join(cell["syms"]), \
+        "allocs": ";".join(str(a) for a in cell["allocs"]), "sv": cell["sv"], "rfr": cell["rfr"], \
+        "sf": cell["sf"], "error": error})
+    return row
+
+
+def run_sweep(cells, n_workers=None, loader=get_data, progress=None, max_groups_in_flight=2):
+    """Assess every cell of a sweep grid across a process pool
+
+    Prices are loaded once per window, for the union of the symbols of its cells, and shared with
+    the workers; each (window, symbol set) task runs in a worker. A symbol that fails to load, or a
+    failing task, only records its error in the rows of the cells that need it.
+
+    Parameters:
+    cells: A list of cells, as returned by build_grid
+    n_workers: Number of worker processes, defaults to the number of CPUs
+    loader: Function (symbols, dates) -> prices, called once per window (and per symbol if that fails)
+    progress: Optional function (n_done, n_cells) called as cells finish
+    max_groups_in_flight: Maximum number of windows whose prices are held in shared memory at once
+
+    Returns:
+    results: A dataframe with one row per cell, in grid order
+    """
+    groups = ((pd.date_range(sd, ed), [(syms, (syms, task)) for syms, task in tasks.items()]) \
+        for (sd, ed), tasks in group_cells(cells).items())
+    rows = []
+    for tasks, result, error in run_grouped(groups, loader, assess_tasks, n_workers=n_workers, \
+        max_groups_in_flight=max_groups_in_flight):
+        if result is None:
+            result = [result_row(cell, error=error) for _, task in tasks for cell in task]
+        rows.extend(result)
+        if progress is not None:
+            progress(len(rows), len(cells))
+
+    results = pd.DataFrame(rows, columns=RESULT_COLUMNS)
+    return results.sort_values("cell").reset_index(drop=True)
+
+
+def read_grid(path):
+    """Read a grid file and return its cells"""
+    with open(path) as f:
+        grid = json.load(f)
+    return build_grid(grid["windows"], grid["portfolios"], grid.get("rfr", [0.0]), grid.get("sf", [252.0]), \
+        grid.get("sv", 1000000))
+
+
+def print_progress(n_done, n_cells):
+    """Print the number of finished cells on one line of stderr"""
+    sys.stderr.write("\r{}/{} cells".format(n_done, n_cells))
+    if n_done == n_cells:
+        sys.stderr.write("\n")
+    sys.stderr.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep assess_portfolio over a grid of inputs")
+    parser.add_argument("grid", help="JSON file of windows, portfolios, rfr and sf")
+    parser.add_argument("-o", "--output", default="sweep.csv", help="results file (.csv)")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    args = parser.parse_args(argv)
+
+    results = run_sweep(read_grid(args.grid), n_workers=args.workers, progress=print_progress)
+    results.to_csv(args.output, index=False)
+    print ("Cells: {} ({} failed)".format(len(results), int((results["error"] != "").sum())))
+
+
+if __name__ == "__main__":
+    main()
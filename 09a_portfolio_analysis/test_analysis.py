@@ -0,0 +1,104 @@
+"""Test for analysis.py"""
+
+
+import os
+import shutil
+import tempfile
+from analysis import *
+from marketdata import get_data_root, set_data_root
+from marketdata.testing import make_prices, write_csv
+import unittest
+import math
+
+
+class TestRiskMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.prices = make_prices(300, ["GOOG", "AAPL", "GLD", "XOM"])
+        self.allocs = [0.2, 0.3, 0.4, 0.1]
+        self.port_val = get_portfolio_value(self.prices, self.allocs, 1000000)
+
+    def test_portfolio_values_match_single_portfolio(self):
+        allocs = [self.allocs, [0.25, 0.25, 0.25, 0.25]]
+        port_vals = get_portfolio_values(self.prices, allocs, 1000000)
+        self.assertEqual(port_vals.shape, (len(self.prices), 2))
+        self.assertTrue(np.allclose(port_vals[:, 0], self.port_val["port_val"].values))
+
+    def test_risk_metrics(self):
+        var, cvar, mdd, mdd_duration, sortino, calmar = get_portfolio_risk_metrics(self.port_val, 0.0, 252, alpha=0.95)
+
+        # Reference values computed with separate pandas scans
+        values = self.port_val["port_val"]
+        daily_returns = compute_daily_returns(self.port_val)["port_val"][1:]
+        ref_var = -daily_returns.quantile(0.05, interpolation="lower")
+        ref_cvar = -daily_returns[daily_returns <= -ref_var].mean()
+        drawdowns = values / values.cummax() - 1
+        downside = np.sqrt((daily_returns.clip(upper=0) ** 2).mean())
+        annual_return = (values.iloc[-1] / values.iloc[0]) ** (252.0 / (len(values) - 1)) - 1
+
+        self.assertTrue(math.isclose(var, ref_var, rel_tol=1e-9), "VaR is incorrect")
+        self.assertTrue(math.isclose(cvar, ref_cvar, rel_tol=1e-9), "CVaR is incorrect")
+        self.assertTrue(math.isclose(mdd, -drawdowns.min(), rel_tol=1e-9), "Maximum drawdown is incorrect")
+        self.assertTrue(math.isclose(sortino, np.sqrt(252) * daily_returns.mean() / downside, rel_tol=1e-9), "Sortino ratio is incorrect")
+        self.assertTrue(math.isclose(calmar, annual_return / -drawdowns.min(), rel_tol=1e-9), "Calmar ratio is incorrect")
+
+        # Longest stretch of consecutive days below the running peak
+        longest, current = 0, 0
+        for dd in drawdowns:
+            current = current + 1 if dd < 0 else 0
+            longest = max(longest, current)
+        self.assertEqual(mdd_duration, longest)
+
+    def test_risk_metrics_batched(self):
+        allocs = np.random.RandomState(1).dirichlet(np.ones(4), size=50)
+        port_vals = get_portfolio_values(self.prices, allocs, 1000000)
+        batched = get_portfolio_risk_metrics(port_vals, 0.0, 252)
+        for k in [0, 17, 49]:
+            single = get_portfolio_risk_metrics(port_vals[:, k], 0.0, 252)
+            for metric_batched, metric_single in zip(batched, single):
+                self.assertTrue(math.isclose(metric_batched[k], metric_single, rel_tol=1e-12))
+
+    def test_one_column_batch_returns_arrays(self):
+        port_vals = get_portfolio_values(self.prices, [self.allocs], 1000000)
+        for metric in compute_portfolio_stats(port_vals) + compute_risk_metrics(port_vals):
+            self.assertEqual(np.shape(metric), (1,))
+        # The wrapper squeezes a one-column dataframe to floats
+        for metric in get_portfolio_risk_metrics(self.port_val, 0.0, 252):
+            self.assertEqual(np.ndim(metric), 0)
+
+    def test_risk_metrics_one_day(self):
+        var, cvar, mdd, mdd_duration, sortino, calmar = get_portfolio_risk_metrics(self.port_val[:1], 0.0, 252)
+        for metric in [var, cvar, sortino, calmar]:
+            self.assertTrue(math.isnan(metric))
+        self.assertEqual(mdd, 0)
+        self.assertEqual(mdd_duration, 0)
+
+
+class TestRenderer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.data_root = get_data_root()
+        set_data_root(self.tmpdir)
+        for symbol in ["SPY", "GOOG", "AAPL"]:
+            write_csv(self.tmpdir, symbol, 300, 1000)
+
+    def tearDown(self):
+        set_data_root(self.data_root)
+        shutil.rmtree(self.tmpdir)
+
+    def test_plots_in_background(self):
+        paths = [os.path.join(self.tmpdir, "plot{}.png".format(i)) for i in range(3)]
+        futures = []
+        with ChartRenderer(n_workers=2) as renderer:
+            for path in paths:
+                results = assess_portfolio(dt.datetime(2010,1,1), dt.datetime(2010,12,31), ["GOOG", "AAPL"], [0.5, 0.5], \
+                    gen_plot=True, renderer=renderer, plot_path=path, plot_futures=futures)
+                self.assertEqual(len(results), 5)
+            self.assertEqual([future.result() for future in futures], paths)
+        for path in paths:
+            self.assertTrue(os.path.getsize(path) > 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""Test for batch.py"""
+
+
+import os
+import shutil
+import tempfile
+from batch import *
+from marketdata import get_data_root, set_data_root
+from marketdata.testing import make_prices, write_csv
+import unittest
+import math
+
+
+def load_prices(symbols, dates):
+    """Synthetic loader with the same shape as get_data"""
+    prices = make_prices(n_days=len(dates))
+    prices.index = dates
+    if "FAKE" in symbols:
+        raise IOError("No data for FAKE")
+    return prices
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        portfolios = [
+            {"id": "a", "sd": "2010-01-01", "ed": "2010-12-31", "syms": ["GOOG", "AAPL"], "allocs": [0.5, 0.5]},
+            {"id": "b", "sd": "2010-01-01", "ed": "2010-12-31", "syms": ["GLD", "XOM"], "allocs": [0.3, 0.7], "sv": 1000},
+            {"id": "c", "sd": "2011-01-01", "ed": "2011-06-30", "syms": ["GOOG", "GLD", "XOM"], "allocs": [0.2, 0.4, 0.4]},
+            {"id": "d", "sd": "2011-01-01", "ed": "2011-06-30", "syms": ["GOOG", "IBM"], "allocs": [0.5, 0.5]},
+            {"id": "e", "sd": "2012-01-01", "ed": "2012-06-30", "syms": ["FAKE"], "allocs": [1.0]},
+        ]
+        self.spec_path = os.path.join(self.tmpdir, "spec.json")
+        with open(self.spec_path, "w") as f:
+            json.dump(portfolios, f)
+
+    def test_read_spec_csv(self):
+        csv_path = os.path.join(self.tmpdir, "spec.csv")
+        with open(csv_path, "w") as f:
+            f.write("id,sd,ed,syms,allocs,sv\nx,2010-01-01,2010-12-31,GOOG;AAPL,0.6;0.4,\n")
+        job = read_spec(csv_path)[0]
+        self.assertEqual(job["syms"], ["GOOG", "AAPL"])
+        self.assertEqual(job["allocs"], [0.6, 0.4])
+        self.assertEqual(job["sv"], 1000000)
+
+    def test_run_batch(self):
+        jobs = read_spec(self.spec_path)
+        self.assertEqual(len(group_jobs(jobs)), 3)
+
+        output_path = os.path.join(self.tmpdir, "results.jsonl")
+        summary = run_batch(jobs, output_path, n_workers=2, chunk_size=1, loader=load_prices)
+        with open(output_path) as f:
+            rows = {row["id"]: row for row in map(json.loads, f)}
+
+        self.assertEqual(summary["n_jobs"], 5)
+        self.assertEqual(summary["n_succeeded"], 3)
+        self.assertEqual(sorted(rows), ["a", "b", "c", "d", "e"])
+        self.assertIn("IBM", rows["d"]["error"])
+        self.assertIn("FAKE", rows["e"]["error"])
+
+        # Results match assessing each portfolio on its own
+        prices = load_prices([], pd.date_range("2010-01-01", "2010-12-31"))
+        port_val = get_portfolio_value(prices[["GLD", "XOM"]], [0.3, 0.7], 1000)
+        cr, adr, sddr, sr = get_portfolio_stats(port_val, 0.0, 252.0)
+        self.assertTrue(math.isclose(rows["b"]["sr"], sr, rel_tol=1e-9))
+        self.assertTrue(math.isclose(rows["b"]["ev"], port_val.iloc[-1, 0], rel_tol=1e-9))
+
+    def test_load_failure_is_isolated(self):
+        # FAKE shares a date range with a valid job; only the job that needs FAKE fails
+        jobs = read_spec(self.spec_path)
+        jobs[4]["sd"], jobs[4]["ed"] = jobs[0]["sd"], jobs[0]["ed"]
+        output_path = os.path.join(self.tmpdir, "results.jsonl")
+        summary = run_batch(jobs, output_path, n_workers=2, chunk_size=1, loader=load_prices, max_groups_in_flight=1)
+        with open(output_path) as f:
+            rows = {row["id"]: row for row in map(json.loads, f)}
+        self.assertEqual(summary["n_succeeded"], 3)
+        self.assertEqual(rows["a"]["error"], "")
+        self.assertEqual(rows["b"]["error"], "")
+        self.assertIn("FAKE", rows["e"]["error"])
+
+    def test_missing_file_names_symbol(self):
+        # With get_data and CSV files, a missing file raises an error that does not name its symbol
+        data_root = get_data_root()
+        set_data_root(self.tmpdir)
+        try:
+            for symbol in ["SPY", "GOOG", "AAPL"]:
+                write_csv(self.tmpdir, symbol, 600, 1000)
+            jobs = [job for job in read_spec(self.spec_path) if job["id"] in ("a", "d")]
+            jobs[1]["sd"], jobs[1]["ed"] = jobs[0]["sd"], jobs[0]["ed"]
+            output_path = os.path.join(self.tmpdir, "results.jsonl")
+            summary = run_batch(jobs, output_path, n_workers=2)
+            with open(output_path) as f:
+                rows = {row["id"]: row for row in map(json.loads, f)}
+        finally:
+            set_data_root(data_root)
+        self.assertEqual(summary["n_succeeded"], 1)
+        self.assertEqual(rows["a"]["error"], "")
+        self.assertTrue(rows["d"]["error"].startswith("IBM: FileNotFoundError"), rows["d"]["error"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""Test for rebalance.py"""
+
+
+from rebalance import *
+from rebalance import _trade
+from marketdata.testing import make_prices
+import unittest
+import math
+
+
+class TestRebalance(unittest.TestCase):
+
+    def setUp(self):
+        self.prices = make_prices(500, ["GOOG", "AAPL", "GLD", "XOM"])
+        self.allocs = [0.2, 0.3, 0.4, 0.1]
+
+    def test_buy_and_hold_matches_portfolio_value(self):
+        port_val, summary = simulate_portfolio(self.prices, self.allocs, sv=1000000)
+        expected = get_portfolio_value(self.prices, self.allocs, 1000000)
+        self.assertTrue(np.allclose(port_val["port_val"].values, expected["port_val"].values))
+        self.assertEqual(summary["rebalances"], 1)
+        self.assertEqual(summary["costs"], 0)
+
+    def test_calendar_rebalancing_keeps_target_weights(self):
+        port_val, summary = simulate_portfolio(self.prices, self.allocs, rebalance="calendar", freq="M")
+        self.assertEqual(summary["rebalances"], len(set(self.prices.index.to_period("M"))))
+
+        # With a daily rebalance and no costs, the value follows the constant-weight daily returns
+        port_val, summary = simulate_portfolio(self.prices, self.allocs, rebalance="calendar", freq=1)
+        daily_returns = compute_daily_returns(self.prices).values[1:]
+        expected = 1000000 * np.r_[1, np.cumprod(1 + np.dot(daily_returns, self.allocs))]
+        self.assertTrue(np.allclose(port_val["port_val"].values, expected))
+
+    def test_threshold_rebalancing(self):
+        port_val, summary = simulate_portfolio(self.prices, self.allocs, rebalance="threshold", threshold=0.02)
+        self.assertTrue(summary["rebalances"] > 1)
+        loose = simulate_portfolio(self.prices, self.allocs, rebalance="threshold", threshold=0.2)[1]
+        self.assertTrue(loose["rebalances"] < summary["rebalances"])
+
+    def test_costs_and_lots(self):
+        port_val, summary = simulate_portfolio(self.prices, self.allocs, rebalance="calendar", freq="Q", \
+            commission=9.95, commission_rate=0.001, slippage=0.0005, lot_size=100)
+        free = simulate_portfolio(self.prices, self.allocs, rebalance="calendar", freq="Q")[0]
+        self.assertTrue(summary["costs"] > 0)
+        self.assertTrue(port_val["port_val"].iloc[-1] < free["port_val"].iloc[-1])
+        self.assertTrue(port_val["port_val"].min() > 0)
+
+    def test_costs_are_paid_from_cash(self):
+        totals = {"rebalances": 0, "trades": 0, "costs": 0.0, "turnover": 0.0}
+        strategy = dict(commission=9.95, commission_rate=0.001, slippage=0.0005)
+        shares, cash = _trade(np.zeros(4), 1000.0, self.prices.values[0], np.array(self.allocs), strategy, totals)
+        # Everything is invested: cash is zero up to rounding, never a loan
+        self.assertTrue(cash >= -1e-9)
+        self.assertTrue(math.isclose(np.dot(shares, self.prices.values[0]) + cash + totals["costs"], 1000.0))
+
+        # A small portfolio rebalanced often, in whole shares
+        port_val, summary = simulate_portfolio(self.prices, self.allocs, sv=2000, rebalance="calendar", freq="M", \
+            commission=9.95, commission_rate=0.001, slippage=0.0005, lot_size=1)
+        self.assertTrue(summary["costs"] > 0)
+        self.assertTrue(port_val["port_val"].min() > 0)
+
+    def test_strategies_batch(self):
+        strategies = [dict(allocs=self.allocs, rebalance="calendar", freq=f, commission=1.0) for f in ["W", "M", "Q", 21]]
+        strategies.append(dict(allocs=self.allocs))
+        port_vals, summary = simulate_strategies(self.prices, strategies)
+        self.assertEqual(port_vals.shape, (len(self.prices), 5))
+        for k in [1, 4]:
+            port_val, row = simulate_portfolio(self.prices, **strategies[k])
+            self.assertTrue(np.allclose(port_vals[k].values, port_val["port_val"].values))
+            cr, adr, sddr, sr = get_portfolio_stats(port_val, 0.0, 252.0)
+            self.assertTrue(math.isclose(summary["sr"][k], sr, rel_tol=1e-9))
+            self.assertEqual(summary["rebalances"][k], row["rebalances"])
+
+
+if __name__ == '__main__':
+    unittest.main()
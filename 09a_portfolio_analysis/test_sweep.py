@@ -0,0 +1,57 @@
+"""Test for sweep.py"""
+
+
+from sweep import *
+from test_batch import load_prices
+import unittest
+import math
+
+
+class TestSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.windows = [("2010-01-01", "2010-12-31"), ("2011-01-01", "2011-06-30"), ("2012-01-01", "2012-06-30")]
+        self.portfolios = [
+            {"syms": ["GOOG", "AAPL"], "allocs": [0.5, 0.5]},
+            {"syms": ["GOOG", "AAPL"], "allocs": [0.8, 0.2]},
+            ["GLD", "XOM", "GOOG"],
+            ["GOOG", "IBM"],
+        ]
+
+    def test_build_grid(self):
+        cells = build_grid(self.windows, self.portfolios, rfrs=[0.0, 0.0001], sfs=[252, 52])
+        self.assertEqual(len(cells), 3 * 4 * 2 * 2)
+        self.assertEqual(cells[8]["allocs"], [1.0 / 3] * 3)
+        self.assertEqual(len(group_cells(cells)), 3)
+        self.assertEqual(len(group_cells(cells)[(pd.Timestamp("2010-01-01"), pd.Timestamp("2010-12-31"))]), 3)
+
+    def test_run_sweep(self):
+        cells = build_grid(self.windows, self.portfolios, rfrs=[0.0, 0.0001], sfs=[252, 52])
+        # The third window also needs FAKE, which fails to load: only its own cell fails
+        cells.append(build_grid([self.windows[2]], [["FAKE"]])[0])
+        cells[-1]["cell"] = len(cells) - 1
+        done = []
+        results = run_sweep(cells, n_workers=2, loader=load_prices, progress=lambda n, total: done.append((n, total)), \
+            max_groups_in_flight=1)
+
+        self.assertEqual(list(results["cell"]), list(range(len(cells))))
+        self.assertEqual(done[-1], (len(cells), len(cells)))
+        failed = results["error"] != ""
+        self.assertTrue(results[results["syms"] == "FAKE"]["error"].str.contains("FAKE").all())
+        self.assertTrue(results[results["syms"] == "GOOG;IBM"]["error"].str.contains("IBM").all())
+        self.assertEqual(set(results[failed]["syms"]), set(["FAKE", "GOOG;IBM"]))
+        self.assertEqual((~failed).sum(), 3 * 3 * 2 * 2)
+
+        # Each cell matches assessing its portfolio on its own
+        prices = load_prices([], pd.date_range("2011-01-01", "2011-06-30"))
+        port_val = get_portfolio_value(prices[["GOOG", "AAPL"]], [0.8, 0.2], 1000000)
+        cr, adr, sddr, sr = get_portfolio_stats(port_val, 0.0001, 52)
+        row = results[(results["sd"] == pd.Timestamp("2011-01-01")) & (results["allocs"] == "0.8;0.2") \
+            & (results["rfr"] == 0.0001) & (results["sf"] == 52)].iloc[0]
+        self.assertTrue(math.isclose(row["cr"], cr, rel_tol=1e-9))
+        self.assertTrue(math.isclose(row["sr"], sr, rel_tol=1e-9))
+        self.assertTrue(math.isclose(row["ev"], port_val.iloc[-1, 0], rel_tol=1e-9))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,9 +4,6 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 import datetime as dt
-import sys
-# Append the path of the directory one level above the current directory to import util
-sys.path.append('../')
 from util import *
 
 
@@ -14,7 +11,7 @@ def assess_portfolio(sd = dt.datetime(2008,1,1), ed = dt.datetime(2009,1,1), \
     syms = ["GOOG","AAPL","GLD","XOM"], \
     allocs=[0.1,0.2,0.3,0.4], \
     sv=1000000, rfr=0.0, sf=252.0, \
-    gen_plot=False):
+    gen_plot=False, renderer=None, plot_path="plot.png", plot_futures=None):
 
     """Assess a portfolio by computing statistics
 
@@ -27,6 +24,10 @@ def assess_portfolio(sd = dt.datetime(2008,1,1), ed = dt.datetime(2009,1,1), \
     rfr: The risk free return per sample period for the entire date range, assuming it does not change
     sf: Sampling frequency per year
     gen_plot: If True, create a plot named plot.png
+    renderer: A ChartRenderer; if given, the plot is written to plot_path in the background instead of shown
+    plot_path: PNG file written by the renderer
+    plot_futures: An optional list; with a renderer, the Future of plot_path is appended to it, so
+        callers can wait for the chart without a change of return values
 
     Returns:
     cr: Cumulative return
@@ -52,7 +53,10 @@ def assess_portfolio(sd = dt.datetime(2008,1,1), ed = dt.datetime(2009,1,1), \
     if gen_plot:
         # Create a temporary dataframe with both the SPY and Portfolio
         df_temp = pd.concat([port_val, prices_SPY], keys=["Portfolio", "SPY"], axis=1)
-        plot_normalized_data(df_temp, title="Daily portfolio and SPY", xlabel="Date", ylabel="Normalized price")    
+        plot = plot_normalized_data(df_temp, title="Daily portfolio and SPY", xlabel="Date", \
+            ylabel="Normalized price", renderer=renderer, path=plot_path)
+        if renderer is not None and plot_futures is not None:
+            plot_futures.append(plot)
 
     # Compute end value
     ev = port_val.ix[-1, 0]
@@ -112,14 +116,14 @@ def get_portfolio_stats(port_val, daily_rf, samples_per_year):
     return cr, adr, sddr, sr
 
 
-def plot_normalized_data(df, title, xlabel, ylabel):
+def plot_normalized_data(df, title, xlabel, ylabel, renderer=None, path="plot.png"):
     """Helper function to normalize and plot data"""
 
     # Normalize the data
     df = normalize_data(df)
 
     # Plot the normalized data
-    plot_data(df, title=title, xlabel=xlabel, ylabel=ylabel)
+    return plot_data(df, title=title, xlabel=xlabel, ylabel=ylabel, renderer=renderer, path=path)
 
 
 def test_code():
@@ -0,0 +1,99 @@
+"""Estimate the mean and covariance of daily returns
+
+The estimators work on a 2D array of daily returns of shape (days, symbols). Each one is
+computed once per price window. A mean-variance objective only needs the mean vector and the
+covariance matrix, so evaluating it costs O(N^2) instead of a pass over the whole price history.
+"""
+
+import numpy as np
+
+
+def get_daily_returns(prices):
+    """Return the daily returns of a price dataframe or array as a float64 array, without the first day"""
+    values = np.asarray(prices, dtype=np.float64)
+    return values[1:] / values[:-1] - 1
+
+
+def sample_covariance(returns):
+    """Sample covariance matrix (ddof=1), like np.cov(returns, rowvar=False)"""
+    returns = np.asarray(returns, dtype=np.float64)
+    centered = returns - returns.mean(axis=0)
+    return np.dot(centered.T, centered) / (len(returns) - 1)
+
+
+def ledoit_wolf_covariance(returns):
+    """Shrink the sample covariance towards a scaled identity matrix (Ledoit and Wolf, 2004)
+
+    The shrinkage intensity is estimated from the data, so it grows when there are few days per
+    symbol. The result is well conditioned even when there are more symbols than days.
+
+    Parameters:
+    returns: Daily returns, an array of shape (days, symbols)
+
+    Returns:
+    cov: Shrunk covariance matrix, from the biased (ddof=0) sample covariance
+    shrinkage: Weight of the scaled identity target, between 0 and 1
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    n_days, n_symbols = returns.shape
+    centered = returns - returns.mean(axis=0)
+    cov = np.dot(centered.T, centered) / n_days
+
+    # Target: the average variance on the diagonal
+    mu = np.trace(cov) / n_symbols
+    cov_norm = np.sum(np.square(cov))
+    delta = (cov_norm - 2 * mu * np.trace(cov) + n_symbols * mu ** 2) / n_symbols
+
+    # Variance of the entries of the sample covariance, from the norms of the daily outer products
+    row_norms = np.sum(np.square(centered), axis=1)
+    beta = (np.sum(np.square(row_norms)) / n_days - cov_norm) / (n_symbols * n_days)
+
+    shrinkage = 0.0 if delta == 0 else min(beta, delta) / delta
+    shrunk = (1 - shrinkage) * cov
+    shrunk.flat[::n_symbols + 1] += shrinkage * mu
+    return shrunk, shrinkage
+
+
+def ewma_covariance(returns, lam=0.94):
+    """Exponentially weighted covariance matrix, as in RiskMetrics
+
+    The weight of the return t days before the last one is proportional to lam ** t, so recent
+    returns dominate; lam=1 weighs every day equally (the biased sample covariance).
+
+    Parameters:
+    returns: Daily returns, an array of shape (days, symbols)
+    lam: Decay factor between 0 and 1
+
+    Returns:
+    cov: Covariance matrix of the returns around their weighted mean
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    weights = lam ** np.arange(len(returns) - 1, -1, -1, dtype=np.float64)
+    weights /= weights.sum()
+    centered = returns - np.dot(weights, returns)
+    return np.dot(centered.T * weights, centered)
+
+
+ESTIMATORS = {
+    "sample": sample_covariance,
+    "ledoit_wolf": lambda returns: ledoit_wolf_covariance(returns)[0],
+    "ewma": ewma_covariance,
+}
+
+
+def estimate_moments(prices, estimator="sample", **kwargs):
+    """Estimate the mean and covariance of daily returns over one price window
+
+    Parameters:
+    prices: Adjusted closing prices for portfolio symbols
+    estimator: "sample", "ledoit_wolf" or "ewma"
+    kwargs: Keyword arguments of the estimator, e.g. lam for "ewma"
+
+    Returns:
+    mean: Mean daily return of each symbol, an array of shape (symbols,)
+    cov: Covariance matrix of daily returns, an array of shape (symbols, symbols)
+    """
+    if estimator not in ESTIMATORS:
+        raise ValueError("Unknown covariance estimator: {}".format(estimator))
+    returns = get_daily_returns(prices)
+    return returns.mean(axis=0), ESTIMATORS[estimator](returns, **kwargs)
@@ -0,0 +1,94 @@
+"""Persistent memo of optimize_portfolio results"""
+
+import hashlib
+import json
+import sqlite3
+import time
+import os
+import numpy as np
+import pandas as pd
+from marketdata import symbol_to_path
+
+
+def data_version(symbols, base_dir=None):
+    """Return a fingerprint of the price files of the symbols (plus SPY, which get_data adds)
+
+    The fingerprint changes whenever a file is appended to, corrected or replaced.
+    """
+    stats = []
+    for symbol in sorted(set(symbols) | set(['SPY'])):
+        stat = os.stat(symbol_to_path(symbol, base_dir))
+        stats.append([symbol, stat.st_size, stat.st_mtime_ns])
+    return hashlib.sha256(json.dumps(stats).encode()).hexdigest()
+
+
+def memo_key(sd, ed, syms, version, solver):
+    """Hash the inputs of an optimization, the version of its price data and the solver settings
+
+    Dates are normalized, so a datetime and a string of the same day give the same key.
+    """
+    inputs = {"sd": pd.Timestamp(sd).isoformat(), "ed": pd.Timestamp(ed).isoformat(), "syms": list(syms), "data_version": version, "solver": solver}
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class OptimizationMemo(object):
+    """
+    A size-bounded store of optimization results in an SQLite file
+    Parameters:
+    path: SQLite database file, created if it does not exist
+    max_entries: Number of results kept; the least recently used are evicted first
+    """
+
+    def __init__(self, path="optimization_memo.sqlite", max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = self.misses = 0
+        self._db = sqlite3.connect(path)
+        self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, syms TEXT, result TEXT, last_used REAL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        self._db.commit()
+
+    def get(self, key):
+        """Return the cached (allocs, cr, adr, sddr, sr) for key, or None; allocs is an array, as optimize_portfolio returns"""
+        row = self._db.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._db.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._db.commit()
+        allocs, cr, adr, sddr, sr = json.loads(row[0])
+        return np.asarray(allocs), cr, adr, sddr, sr
+
+    def put(self, key, syms, result):
+        """Store the (allocs, cr, adr, sddr, sr) of an optimization, evicting old results if the store is full"""
+        allocs, cr, adr, sddr, sr = result
+        value = json.dumps([[float(a) for a in allocs], float(cr), float(adr), float(sddr), float(sr)])
+        self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", \
+            (key, ";" + ";".join(syms) + ";", value, time.time()))
+        self._db.execute("DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)", \
+            (self.max_entries,))
+        self._db.commit()
+
+    def invalidate(self, symbols=None):
+        """Drop the results that depend on any of the symbols, or all results if symbols is None
+
+        Results are also keyed by the version of the price files, so appends and corrections made
+        through the files are picked up without this; use it when prices change some other way.
+        """
+        if symbols is None:
+            self._db.execute("DELETE FROM results")
+        elif "SPY" in symbols:
+            # Every optimization loads SPY for its trading calendar
+            self._db.execute("DELETE FROM results")
+        else:
+            # Exact substring match on ";SYMBOL;": LIKE would treat _ and % in tickers as wildcards
+            for symbol in symbols:
+                self._db.execute("DELETE FROM results WHERE instr(syms, ?) > 0", (";" + symbol + ";",))
+        self._db.commit()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        self._db.close()
@@ -5,15 +5,17 @@ import matplotlib.pyplot as plt
 import numpy as np
 import datetime as dt
 import scipy.optimize as spo
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from analysis import *
-import sys
-# Append the path of the directory one level above the current directory to import util
-sys.path.append('../')
 from util import *
+from marketdata.shared_prices import publish_prices, init_worker, get_shared_prices
+from memo import data_version, memo_key
+from covariance import estimate_moments
 
 
 def optimize_portfolio(sd=dt.datetime(2008,1,1), ed=dt.datetime(2009,1,1), \
-    syms=["GOOG","AAPL","GLD","XOM"], gen_plot=False):
+    syms=["GOOG","AAPL","GLD","XOM"], gen_plot=False, n_starts=1, memo=None, estimator=None, renderer=None, \
+    plot_path="plot.png", plot_futures=None):
 
     """Optimize a portfolio and compute its statistics
 
@@ -22,6 +24,16 @@ def optimize_portfolio(sd=dt.datetime(2008,1,1), ed=dt.datetime(2009,1,1), \
     ed: A datetime object that represents the end date
     syms: A list of symbols that make up the portfolio
     gen_plot: If True, create a plot named plot.png
+    n_starts: Number of optimizer starts; if greater than 1, run a parallel multi-start search
+    memo: An OptimizationMemo; results of earlier runs with the same inputs, price data and
+        solver settings are returned from it without solving again
+    estimator: None to maximize the Sharpe ratio of the simulated portfolio, or a covariance
+        estimator ("sample", "ledoit_wolf" or "ewma") to maximize it from the mean and
+        covariance of daily returns, which is much faster for many symbols
+    renderer: A ChartRenderer; if given, the plot is written to plot_path in the background instead of shown
+    plot_path: PNG file written by the renderer
+    plot_futures: An optional list; with a renderer, the Future of plot_path is appended to it, so
+        callers can wait for the chart without a change of return values
 
     Returns:
     allocs: A list of allocations to the stocks, must sum to 1.0
@@ -31,6 +43,18 @@ def optimize_portfolio(sd=dt.datetime(2008,1,1), ed=dt.datetime(2009,1,1), \
     sr: Sharpe ratio
     """
 
+    # Look up the result of an earlier run; the prices are still needed to plot
+    cached = None
+    if memo is not None:
+        solver = {"objective": "negative_sharpe_ratio", "method": "SLSQP", "n_starts": n_starts, \
+            "sv": 1000000, "rfr": 0.0, "sf": 252}
+        if estimator is not None:
+            solver.update(objective="negative_sharpe_ratio_mv", estimator=estimator)
+        key = memo_key(sd, ed, syms, data_version(syms), solver)
+        cached = memo.get(key)
+        if cached is not None and not gen_plot:
+            return cached
+
     # Read in adjusted closing prices for given symbols, date range
     dates = pd.date_range(sd, ed)
     prices_all = get_data(syms, dates)  # automatically adds SPY
@@ -38,7 +62,14 @@ def optimize_portfolio(sd=dt.datetime(2008,1,1), ed=dt.datetime(2009,1,1), \
     prices_SPY = prices_all["SPY"]  # only SPY, for comparison later
 
     # find the allocations for the optimal portfolio
-    allocs = find_optimal_allocations(prices, get_negative_sharpe_ratio, syms)
+    if cached is not None:
+        allocs = np.asarray(cached[0])
+    elif estimator is not None:
+        allocs = find_optimal_allocations_mv(prices, syms, estimator=estimator)
+    elif n_starts > 1:
+        allocs = find_optimal_allocations_multistart(prices, get_negative_sharpe_ratio, syms, n_starts=n_starts)[0]
+    else:
+        allocs = find_optimal_allocations(prices, get_negative_sharpe_ratio, syms)
 
     # Get daily portfolio value
     port_val = get_portfolio_value(prices, allocs, sv=1000000)
@@ -48,22 +79,276 @@ def optimize_portfolio(sd=dt.datetime(2008,1,1), ed=dt.datetime(2009,1,1), \
     if gen_plot:
         # add code to plot here
         df_temp = pd.concat([port_val, prices_SPY], keys=["Portfolio", "SPY"], axis=1)
-        plot_normalized_data(df_temp, title="Daily portfolio and SPY", xlabel="Date", ylabel="Normalized price")    
+        plot = plot_normalized_data(df_temp, title="Daily portfolio and SPY", xlabel="Date", \
+            ylabel="Normalized price", renderer=renderer, path=plot_path)
+        if renderer is not None and plot_futures is not None:
+            plot_futures.append(plot)
+
+    if memo is not None and cached is None:
+        memo.put(key, syms, (allocs, cr, adr, sddr, sr))
 
     return allocs, cr, adr, sddr, sr
 
 
 def find_optimal_allocations(prices, function, syms):
-    bounds = ((0,1),(0,1),(0,1),(0,1))
+    initial_guess = np.ones((len(syms)), dtype=np.float32)/(len(syms))
+
+    return solve_allocations(function, initial_guess, prices).x
+
+
+def solve_allocations(function, initial_guess, prices):
+    """Run one SLSQP solve of function over allocations that are in [0, 1] and sum to 1.0"""
+    bounds = ((0,1),) * len(initial_guess)
 
     constraints = ({'type': 'eq', 'fun': lambda x:  np.sum(x)-1.0})
 
-    initial_guess = np.ones((len(syms)), dtype=np.float32)/(len(syms))
+    return spo.minimize(function, initial_guess, args=(prices,), method='SLSQP', constraints=constraints, bounds=bounds)
+
+
+def find_optimal_allocations_mv(prices, syms, estimator="sample", rfr=0.0, sf=252, **kwargs):
+    """Find the allocations that maximize the Sharpe ratio from estimated moments of daily returns
+
+    The mean and covariance are estimated once, and SLSQP is given the analytic gradient, so each
+    iteration costs O(N^2) regardless of the number of days. The objective is the Sharpe ratio of
+    a portfolio held at constant weights, which is close to the buy-and-hold one over short windows.
+
+    Parameters:
+    prices: Adjusted closing prices for portfolio symbols
+    syms: A list of symbols that make up the portfolio
+    estimator: Covariance estimator, "sample", "ledoit_wolf" or "ewma"
+    rfr: The risk free return per sample period
+    sf: Sampling frequency per year
+    kwargs: Keyword arguments of the estimator, e.g. lam for "ewma"
+
+    Returns:
+    allocs: Optimal allocations, in [0, 1] and summing to 1.0
+    """
+    mean, cov = estimate_moments(prices, estimator, **kwargs)
+    initial_guess = np.ones(len(syms))/len(syms)
+    bounds = ((0,1),) * len(syms)
+
+    constraints = ({'type': 'eq', 'fun': lambda x:  np.sum(x)-1.0, 'jac': lambda x: np.ones_like(x)})
 
-    result = spo.minimize(function, initial_guess, args=(prices,), method='SLSQP', constraints=constraints, bounds=bounds)
+    result = spo.minimize(get_negative_sharpe_ratio_mv, initial_guess, args=(mean, cov, rfr, sf), \
+        jac=get_negative_sharpe_ratio_mv_jac, method='SLSQP', constraints=constraints, bounds=bounds)
     return result.x
 
 
+def find_optimal_allocations_batch(prices_list, rfr=0.0, sf=252, max_iter=1000, tol=1e-6, batch_size=1024, \
+    dtype=np.float32):
+
+    """Find the optimal allocations of many independent portfolios together
+
+    Each portfolio maximizes the Sharpe ratio of its own prices, exactly like find_optimal_allocations,
+    but the problems are stacked into padded arrays and solved at once by projected gradient
+    descent on the simplex: every iteration evaluates the objective and its analytic gradient for all
+    unconverged problems with a few vectorized operations, backtracks the step of the problems
+    whose objective did not decrease enough, and projects the allocations back onto [0, 1] with sum 1.0.
+
+    Parameters:
+    prices_list: A list of price dataframes (or 2D arrays), one per portfolio; each may have its own
+        symbols and number of days
+    rfr: The risk free return per sample period
+    sf: Sampling frequency per year
+    max_iter: Maximum number of iterations
+    tol: The solve of a portfolio converges when no allocation moves by more than tol in an accepted step
+    batch_size: Number of problems solved together, to bound memory
+    dtype: Floating point type of the iterations; float32 halves memory traffic
+
+    Returns:
+    allocs: A list of allocation arrays, one per portfolio
+    diagnostics: A dict of arrays with the final objective (negative Sharpe ratio), the number of
+        iterations, whether each portfolio converged and whether its solve stalled, i.e. stopped
+        because the step shrank below machine precision before meeting tol (stalled solves are
+        not converged)
+    """
+    allocs, fun, n_iter, converged, stalled = [], [], [], [], []
+    for i in range(0, len(prices_list), batch_size):
+        batch = [np.asarray(prices, dtype=np.float64) for prices in prices_list[i:i + batch_size]]
+        result = _solve_batch(batch, rfr, sf, max_iter, tol, dtype)
+        allocs.extend(result[0])
+        fun.append(result[1])
+        n_iter.append(result[2])
+        converged.append(result[3])
+        stalled.append(result[4])
+    diagnostics = {'fun': np.concatenate(fun), 'n_iter': np.concatenate(n_iter), 'converged': np.concatenate(converged), \
+        'stalled': np.concatenate(stalled)}
+    return allocs, diagnostics
+
+
+def find_optimal_allocations_multistart(prices, function, syms, n_starts=32, n_workers=None, \
+    tol=1e-6, patience=8, seed=0):
+
+    """Find optimal allocations by running many seeded SLSQP solves across a process pool
+
+    The price matrix is published once into shared memory, and every worker attaches to it
+    when it starts, so prices are never pickled per solve. Starts are submitted all at once;
+    as soon as `patience` consecutive finished starts fail to improve the best objective by
+    more than `tol`, the search is considered converged and the remaining starts are cancelled.
+
+    Parameters:
+    prices: Adjusted closing prices for portfolio symbols
+    function: Objective function f(allocs, prices) to minimize, must be defined at module level
+    syms: A list of symbols that make up the portfolio
+    n_starts: Number of starts; the first start is the equal-weight allocation
+    n_workers: Number of worker processes, defaults to the number of CPUs
+    tol: Minimum improvement of the objective that counts as progress
+    patience: Number of finished starts without progress after which the search stops
+    seed: Seed of the random starting allocations
+
+    Returns:
+    allocs: Allocations of the best solve
+    diagnostics: A dict with the best objective value, counts of completed, failed and cancelled
+    starts, whether the search converged early, and per-start results
+    """
+    rng = np.random.RandomState(seed)
+    initial_guesses = np.vstack([np.ones(len(syms))/len(syms), rng.dirichlet(np.ones(len(syms)), size=n_starts - 1)])
+
+    with publish_prices(prices) as shared:
+        best, starts, stale = None, [], 0
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=init_worker, initargs=(shared.handle,)) as executor:
+            futures = {executor.submit(_solve_start, function, guess, shared.handle): i for i, guess in enumerate(initial_guesses)}
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                try:
+                    result = future.result()
+                except Exception as e:
+                    starts.append({'start': futures[future], 'error': repr(e)})
+                    continue
+                result['start'] = futures[future]
+                starts.append(result)
+
+                if not result['success']:
+                    stale += 1
+                elif best is None or result['fun'] < best['fun'] - tol:
+                    best, stale = result, 0
+                else:
+                    stale += 1
+                    if result['fun'] < best['fun']:
+                        best = result
+
+                if best is not None and stale >= patience:
+                    for f in futures:
+                        f.cancel()
+                    break
+
+    if best is None:
+        raise RuntimeError("All {} optimizer starts failed".format(len(starts)))
+
+    n_failed = sum(1 for r in starts if not r.get('success', False))
+    diagnostics = {'fun': best['fun'], 'best_start': best['start'], 'n_starts': n_starts, \
+        'n_completed': len(starts) - n_failed, 'n_failed': n_failed, \
+        'n_cancelled': n_starts - len(starts), 'converged': stale >= patience, \
+        'starts': sorted(starts, key=lambda r: r['start'])}
+    return best['x'], diagnostics
+
+
+def _solve_batch(batch, rfr, sf, max_iter, tol, dtype):
+    """Solve one stack of problems; see find_optimal_allocations_batch"""
+    n_problems = len(batch)
+    n_days = max(len(values) for values in batch)
+    n_symbols = max(values.shape[1] for values in batch)
+
+    # Pad to (problems, days, symbols): padded symbols are held at zero by the projection and
+    # padded days repeat a price of 1.0 and are masked out of the statistics
+    norm_prices = np.ones((n_problems, n_days, n_symbols), dtype=dtype)
+    symbol_mask = np.zeros((n_problems, n_symbols), dtype=bool)
+    return_mask = np.zeros((n_problems, n_days - 1), dtype=dtype)
+    for k, values in enumerate(batch):
+        norm_prices[k, :len(values), :values.shape[1]] = values / values[0]
+        symbol_mask[k, :values.shape[1]] = True
+        return_mask[k, :len(values) - 1] = 1
+
+    allocs = _project_simplex(np.where(symbol_mask, 1.0, 0.0).astype(dtype), symbol_mask)
+    fun, grad = _negative_sharpe_ratio_batch(allocs, norm_prices, return_mask, rfr, sf)
+    step = (0.1 / np.maximum(np.sqrt(np.sum(grad * grad, axis=1)), 1e-12)).astype(dtype)
+    n_iter = np.zeros(n_problems, dtype=int)
+    converged = np.zeros(n_problems, dtype=bool)
+    stalled = np.zeros(n_problems, dtype=bool)
+    active = np.arange(n_problems)
+
+    for _ in range(max_iter):
+        if len(active) == 0:
+            break
+        a = active
+        candidate = _project_simplex(allocs[a] - step[a, np.newaxis] * grad[a], symbol_mask[a])
+        candidate_fun, candidate_grad = _negative_sharpe_ratio_batch(candidate, norm_prices[a], return_mask[a], rfr, sf)
+
+        # Armijo condition on the projected step; rejected problems retry with half the step
+        decrease = np.sum(grad[a] * (allocs[a] - candidate), axis=1)
+        accepted = candidate_fun <= fun[a] - 1e-4 * decrease
+        moved = np.abs(candidate - allocs[a]).max(axis=1)
+        n_iter[a] += 1
+
+        allocs[a[accepted]] = candidate[accepted]
+        fun[a[accepted]] = candidate_fun[accepted]
+        grad[a[accepted]] = candidate_grad[accepted]
+        step[a] = np.where(accepted, step[a] * 2, step[a] / 2)
+
+        # A step that shrinks below precision ends the solve too, but is not convergence
+        finished = accepted & (moved < tol)
+        collapsed = ~finished & (step[a] < np.finfo(dtype).eps)
+        converged[a[finished]] = True
+        stalled[a[collapsed]] = True
+        active = a[~(finished | collapsed)]
+
+    allocs = [allocs[k, :values.shape[1]].astype(np.float64) for k, values in enumerate(batch)]
+    return allocs, fun.astype(np.float64), n_iter, converged, stalled
+
+
+def _negative_sharpe_ratio_batch(allocs, norm_prices, return_mask, rfr, sf):
+    """Negative Sharpe ratio of stacked buy-and-hold portfolios and its gradient
+
+    Parameters:
+    allocs: Allocations, an array of shape (problems, symbols)
+    norm_prices: Prices normalized to the first day, an array of shape (problems, days, symbols)
+    return_mask: 1 for the daily returns of each problem and 0 for padding, shape (problems, days - 1)
+    rfr: The risk free return per sample period
+    sf: Sampling frequency per year
+
+    Returns:
+    fun: Negative Sharpe ratios, an array of shape (problems,)
+    grad: Gradients with respect to the allocations, an array of shape (problems, symbols)
+    """
+    port_val = np.einsum('btn,bn->bt', norm_prices, allocs)
+    returns = (port_val[:, 1:] / port_val[:, :-1] - 1) * return_mask
+    n = return_mask.sum(axis=1)
+    adr = returns.sum(axis=1) / n
+    deviations = (returns - adr[:, np.newaxis]) * return_mask
+    sddr = np.sqrt(np.sum(deviations * deviations, axis=1) / (n - 1))
+    k = np.sqrt(sf)
+    fun = -compute_sharpe_ratio(k, adr, rfr, sddr)
+
+    # Chain rule: d(-sr)/d(return t), then d(return t)/d(allocs) through the portfolio values
+    d_returns = -k * (1 / (n * sddr))[:, np.newaxis] * return_mask \
+        + (k * (adr - rfr) / ((n - 1) * sddr ** 3))[:, np.newaxis] * deviations
+    previous = port_val[:, :-1]
+    grad = np.einsum('bt,btn->bn', d_returns / previous, norm_prices[:, 1:]) \
+        - np.einsum('bt,btn->bn', d_returns * port_val[:, 1:] / (previous * previous), norm_prices[:, :-1])
+    return fun, grad
+
+
+def _project_simplex(values, mask):
+    """Euclidean projection of each row onto {x >= 0, sum(x) = 1}, over the entries where mask is True"""
+    n_symbols = values.shape[1]
+    inf = np.array(np.inf, dtype=values.dtype)
+    u = -np.sort(np.where(mask, -values, inf), axis=1)
+    valid = np.isfinite(u)
+    css = np.cumsum(np.where(valid, u, 0), axis=1)
+    rank = np.arange(1, n_symbols + 1, dtype=values.dtype)
+    rho = np.sum(valid & (u - (css - 1) / rank > 0), axis=1)
+    theta = (css[np.arange(len(values)), rho - 1] - 1) / rho
+    return np.where(mask, np.maximum(values - theta[:, np.newaxis], 0), 0).astype(values.dtype)
+
+
+def _solve_start(function, initial_guess, handle):
+    """Worker task: run one SLSQP solve on the shared prices"""
+    result = solve_allocations(function, initial_guess, get_shared_prices(handle))
+    return {'x': result.x, 'fun': float(result.fun), 'nit': int(result.nit), \
+        'success': bool(result.success), 'message': result.message}
+
+
 def get_negative_sharpe_ratio(allocs, prices, sv=1000000, rfr=0.0, sf=252):
     # Get daily portfolio value
     port_val = get_portfolio_value(prices, allocs, sv)
@@ -71,4 +356,17 @@ def get_negative_sharpe_ratio(allocs, prices, sv=1000000, rfr=0.0, sf=252):
     # Get portfolio statistics
     neg_sr = get_portfolio_stats(port_val, rfr, sf)[3] * (-1)
 
-    return neg_sr
\ No newline at end of file
+    return neg_sr
+
+
+def get_negative_sharpe_ratio_mv(allocs, mean, cov, rfr=0.0, sf=252):
+    """Negative Sharpe ratio of allocations from the mean and covariance of daily returns"""
+    return -np.sqrt(sf) * (np.dot(mean, allocs) - rfr) / np.sqrt(np.dot(allocs, np.dot(cov, allocs)))
+
+
+def get_negative_sharpe_ratio_mv_jac(allocs, mean, cov, rfr=0.0, sf=252):
+    """Gradient of get_negative_sharpe_ratio_mv with respect to the allocations"""
+    cov_allocs = np.dot(cov, allocs)
+    var = np.dot(allocs, cov_allocs)
+    excess = np.dot(mean, allocs) - rfr
+    return -np.sqrt(sf) * (mean / np.sqrt(var) - excess * cov_allocs / var ** 1.5)
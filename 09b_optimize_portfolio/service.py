@@ -0,0 +1,305 @@
+"""Local HTTP analytics service for assessing and optimizing portfolios
+
+Usage:
+python service.py [--host 127.0.0.1] [--port 8050] [--workers N]
+
+Endpoints (JSON in, JSON out):
+GET  /health
+POST /assess    {"sd", "ed", "syms", "allocs", optional "sv", "rfr", "sf"}
+POST /optimize  {"sd", "ed", "syms"}
+
+Prices stay cached in memory between requests and concurrent loads of the same symbols and
+dates are coalesced into one. Missing prices are filled forward, then backward, when they are
+loaded (as fill_missing_values in 05 incomplete_data does). Assessment requests arriving within a short window are grouped
+by price set and evaluated together as one vectorized computation. Optimizations run in a
+process pool over shared-memory prices, so the event loop never blocks on a solve.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from optimization import *
+from marketdata.shared_prices import publish_prices, attach_prices, detach_prices
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}
+
+
+class AnalyticsService(object):
+    """
+    Serve assess_portfolio and optimize_portfolio over HTTP on a warm price cache
+    Parameters:
+    loader: function (symbols, dates) -> prices, called at most once per cached price set
+    max_cache_entries: number of price sets kept in memory, least recently used are evicted first
+    batch_window: seconds to wait for more assessment requests before evaluating a batch
+    max_batch: number of queued assessment requests that triggers an immediate evaluation
+    n_workers: number of optimizer processes, defaults to the number of CPUs
+    """
+
+    def __init__(self, loader=get_data, max_cache_entries=64, batch_window=0.002, max_batch=1024, n_workers=None):
+        self.loader = loader
+        self.max_cache_entries = max_cache_entries
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.n_workers = n_workers
+        self.stats = {"requests": 0, "price_loads": 0, "batches": 0, "optimizations": 0}
+        self._cache = OrderedDict()  # price key -> [prices, SharedPrices or None]
+        self._loading = {}  # price key -> future of prices being loaded
+        self._optimizing = {}  # price key -> future of an optimization in progress
+        self._queue = []
+        self._flush_timer = None
+        self._tasks = set()  # batches being assessed; the event loop only keeps weak references
+        self._server = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Start listening; port 0 picks a free port, available as self.port"""
+        self._threads = ThreadPoolExecutor(max_workers=4)
+        # Workers start lazily, once the event loop and loader threads run: forking then could copy
+        # locks held by those threads, so the workers come from a forkserver instead
+        self._processes = ProcessPoolExecutor(max_workers=self.n_workers, \
+            mp_context=multiprocessing.get_context("forkserver"))
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        """Stop listening and release the workers and shared prices"""
+        self._server.close()
+        await self._server.wait_closed()
+        self._processes.shutdown()
+        self._threads.shutdown()
+        for prices, shared in self._cache.values():
+            if shared is not None:
+                shared.release()
+        self._cache.clear()
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    # Price cache
+
+    async def get_prices(self, sd, ed, syms):
+        """Return cached prices for the symbol set and date range, loading them at most once"""
+        key = price_key(sd, ed, syms)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key][0]
+        if key not in self._loading:
+            # The first request for a key loads it, concurrent requests wait for the same load
+            self._loading[key] = asyncio.ensure_future(self._load_prices(key))
+        return await asyncio.shield(self._loading[key])
+
+    async def _load_prices(self, key):
+        sd, ed, syms = key
+        try:
+            loop = asyncio.get_running_loop()
+            prices = await loop.run_in_executor(self._threads, self.loader, list(syms), pd.date_range(sd, ed))
+            prices = prices.ffill().bfill()
+            self.stats["price_loads"] += 1
+            self._cache[key] = [prices, None]
+            while len(self._cache) > self.max_cache_entries:
+                _, shared = self._cache.popitem(last=False)[1]
+                if shared is not None:
+                    shared.release()
+            return prices
+        finally:
+            del self._loading[key]
+
+    async def get_shared_prices(self, sd, ed, syms):
+        """Return the SharedPrices of a cached price set, publishing them on first use"""
+        await self.get_prices(sd, ed, syms)
+        entry = self._cache[price_key(sd, ed, syms)]
+        if entry[1] is None:
+            entry[1] = publish_prices(entry[0])
+        return entry[1]
+
+    # Assessment, micro-batched
+
+    async def assess(self, request):
+        """Queue an assessment request and wait for the batch that evaluates it"""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((parse_portfolio(request), future))
+        if len(self._queue) >= self.max_batch:
+            self._flush()
+        elif self._flush_timer is None:
+            self._flush_timer = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        batch, self._queue = self._queue, []
+        groups = OrderedDict()
+        for portfolio, future in batch:
+            groups.setdefault(price_key(portfolio["sd"], portfolio["ed"], portfolio["syms"]), []).append((portfolio, future))
+        for key, group in groups.items():
+            task = asyncio.ensure_future(self._assess_group(key, group))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _assess_group(self, key, group):
+        try:
+            prices_all = await self.get_prices(*key)
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(self._threads, assess_group, prices_all, [p for p, f in group])
+            self.stats["batches"] += 1
+        except Exception as e:
+            for portfolio, future in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (portfolio, future), result in zip(group, results):
+            if not future.done():
+                future.set_result(result)
+
+    # Optimization, offloaded to the process pool
+
+    async def optimize(self, request):
+        """Optimize a portfolio in the process pool; concurrent identical requests share one solve"""
+        portfolio = parse_portfolio(request, allocs_required=False)
+        key = price_key(portfolio["sd"], portfolio["ed"], portfolio["syms"]) + (tuple(portfolio["syms"]),)
+        if key not in self._optimizing:
+            self._optimizing[key] = asyncio.ensure_future(self._optimize(portfolio, key))
+        return await asyncio.shield(self._optimizing[key])
+
+    async def _optimize(self, portfolio, key):
+        try:
+            shared = await self.get_shared_prices(portfolio["sd"], portfolio["ed"], portfolio["syms"])
+            shared.retain()
+            try:
+                loop = asyncio.get_running_loop()
+                allocs, cr, adr, sddr, sr = await loop.run_in_executor(self._processes, optimize_shared, \
+                    shared.handle, portfolio["syms"])
+            finally:
+                shared.release()
+            self.stats["optimizations"] += 1
+            return {"allocs": [float(a) for a in allocs], "cr": float(cr), "adr": float(adr), \
+                "sddr": float(sddr), "sr": float(sr)}
+        finally:
+            del self._optimizing[key]
+
+    # HTTP
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path = request_line.decode("latin-1").split()[:2]
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status, response = await self._route(method, path, body)
+                payload = json.dumps(response).encode()
+                writer.write("HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n\r\n".format( \
+                    status, REASONS[status], len(payload)).encode() + payload)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        self.stats["requests"] += 1
+        try:
+            if method == "GET" and path == "/health":
+                return 200, dict(self.stats, cached_price_sets=len(self._cache))
+            if method == "POST" and path == "/assess":
+                return 200, await self.assess(json.loads(body or b"{}"))
+            if method == "POST" and path == "/optimize":
+                return 200, await self.optimize(json.loads(body or b"{}"))
+            return 404, {"error": "No route for {} {}".format(method, path)}
+        except (KeyError, TypeError, ValueError) as e:
+            return 400, {"error": repr(e)}
+        except Exception as e:
+            return 500, {"error": repr(e)}
+
+
+def price_key(sd, ed, syms):
+    """Cache key of a price set: the date range and the sorted symbols"""
+    return (pd.Timestamp(sd), pd.Timestamp(ed), tuple(sorted(set(syms))))
+
+
+def parse_portfolio(request, allocs_required=True):
+    """Validate a request and fill in assess_portfolio defaults"""
+    portfolio = {"sd": pd.Timestamp(request["sd"]), "ed": pd.Timestamp(request["ed"]), "syms": list(request["syms"]), \
+        "sv": float(request.get("sv", 1000000)), "rfr": float(request.get("rfr", 0.0)), "sf": float(request.get("sf", 252.0))}
+    if allocs_required:
+        portfolio["allocs"] = [float(a) for a in request["allocs"]]
+        if len(portfolio["allocs"]) != len(portfolio["syms"]):
+            raise ValueError("Got {} allocations for {} symbols".format(len(portfolio["allocs"]), len(portfolio["syms"])))
+    return portfolio
+
+
+def assess_group(prices_all, portfolios):
+    """Assess portfolios over the same price set as one vectorized computation
+
+    Returns one dict per portfolio with cr, adr, sddr, sr and ev, as assess_portfolio computes them
+    for filled prices. Prices with missing values are rejected with a ValueError; the service fills
+    them when they are loaded.
+    """
+    syms = sorted(set(s for p in portfolios for s in p["syms"]))
+    missing = [s for s in syms if prices_all[s].isnull().any()]
+    if missing:
+        raise ValueError("Missing prices for {}; fill them first".format(", ".join(missing)))
+    columns = dict((s, i) for i, s in enumerate(syms))
+    allocs = np.zeros((len(portfolios), len(syms)))
+    for k, p in enumerate(portfolios):
+        allocs[k, [columns[s] for s in p["syms"]]] = p["allocs"]
+    sv = np.array([p["sv"] for p in portfolios])
+    rfr = np.array([p["rfr"] for p in portfolios])
+    sf = np.array([p["sf"] for p in portfolios])
+
+    port_vals = compute_portfolio_values(normalize_data(prices_all[syms]).values, allocs, sv)
+    cr, adr, sddr, sr = compute_portfolio_stats(port_vals, rfr, sf)
+    return [{"cr": float(cr[k]), "adr": float(adr[k]), "sddr": float(sddr[k]), "sr": float(sr[k]), \
+        "ev": float(port_vals[-1, k])} for k in range(len(portfolios))]
+
+
+def optimize_shared(handle, syms):
+    """Worker task: optimize_portfolio on shared prices"""
+    prices_all = attach_prices(handle)
+    try:
+        prices = prices_all[syms]
+        allocs = find_optimal_allocations(prices, get_negative_sharpe_ratio, syms)
+        port_val = get_portfolio_value(prices, allocs, sv=1000000)
+        cr, adr, sddr, sr = get_portfolio_stats(port_val, daily_rf=0.0, samples_per_year=252)
+        return allocs, cr, adr, sddr, sr
+    finally:
+        del prices_all
+        detach_prices(handle)
+
+
+async def serve(host, port, n_workers):
+    service = await AnalyticsService(n_workers=n_workers).start(host, port)
+    print ("Serving on http://{}:{}".format(host, service.port))
+    try:
+        await service.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP analytics service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--workers", type=int, default=None, help="number of optimizer processes")
+    args = parser.parse_args(argv)
+    asyncio.run(serve(args.host, args.port, args.workers))
+
+
+if __name__ == "__main__":
+    main()
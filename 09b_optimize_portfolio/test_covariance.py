@@ -0,0 +1,58 @@
+"""Test for covariance.py"""
+
+
+from covariance import *
+import unittest
+
+
+class TestCovariance(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        # Correlated returns: a common factor plus noise
+        factor = rng.normal(0, 0.01, (300, 1))
+        self.returns = factor * rng.uniform(0.5, 1.5, 8) + rng.normal(0, 0.01, (300, 8))
+
+    def test_sample(self):
+        self.assertTrue(np.allclose(sample_covariance(self.returns), np.cov(self.returns, rowvar=False)))
+
+    def test_ledoit_wolf(self):
+        cov, shrinkage = ledoit_wolf_covariance(self.returns)
+
+        # Compare with the definition, one outer product per day
+        n_days, n_symbols = self.returns.shape
+        centered = self.returns - self.returns.mean(axis=0)
+        sample = np.dot(centered.T, centered) / n_days
+        mu = np.trace(sample) / n_symbols
+        delta = np.sum(np.square(sample - mu * np.eye(n_symbols))) / n_symbols
+        beta = sum(np.sum(np.square(np.outer(x, x) - sample)) for x in centered) / n_days ** 2 / n_symbols
+        expected = min(beta, delta) / delta
+        self.assertAlmostEqual(shrinkage, expected)
+        self.assertTrue(np.allclose(cov, expected * mu * np.eye(n_symbols) + (1 - expected) * sample))
+        self.assertTrue(0 < shrinkage < 1)
+
+    def test_ledoit_wolf_more_symbols_than_days(self):
+        returns = np.random.RandomState(1).normal(0, 0.01, (20, 50))
+        self.assertTrue(np.linalg.eigvalsh(sample_covariance(returns)).min() < 1e-12)
+        self.assertTrue(np.linalg.eigvalsh(ledoit_wolf_covariance(returns)[0]).min() > 0)
+
+    def test_ewma(self):
+        # Equal weights give the biased sample covariance
+        self.assertTrue(np.allclose(ewma_covariance(self.returns, lam=1.0), np.cov(self.returns, rowvar=False, ddof=0)))
+
+        # Recent returns dominate: a volatile last month raises the estimate
+        returns = self.returns.copy()
+        returns[-20:] *= 3
+        self.assertTrue(np.all(np.diag(ewma_covariance(returns)) > np.diag(sample_covariance(returns))))
+
+    def test_estimate_moments(self):
+        prices = 100 * np.cumprod(1 + np.vstack([np.zeros((1, 8)), self.returns]), axis=0)
+        mean, cov = estimate_moments(prices, "ewma", lam=0.97)
+        self.assertTrue(np.allclose(mean, self.returns.mean(axis=0)))
+        self.assertTrue(np.allclose(cov, ewma_covariance(self.returns, lam=0.97)))
+        with self.assertRaises(ValueError):
+            estimate_moments(prices, "shrunk")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Test for memo.py"""
+
+
+import datetime as dt
+import shutil
+import tempfile
+from memo import *
+import unittest
+
+
+class TestOptimizationMemo(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.memo = OptimizationMemo(os.path.join(self.tmpdir, "memo.sqlite"), max_entries=3)
+        self.result = ([0.0, 0.4, 0.6, 0.0], 0.36, 0.0013, 0.01, 2.0)
+
+    def tearDown(self):
+        self.memo.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_get_put(self):
+        key = memo_key("2010-01-01", "2010-12-31", ["GOOG", "AAPL"], "v1", {"method": "SLSQP"})
+        self.assertIsNone(self.memo.get(key))
+        self.memo.put(key, ["GOOG", "AAPL"], self.result)
+        cached = self.memo.get(key)
+        self.assertIsInstance(cached[0], np.ndarray)
+        self.assertEqual(cached[0].tolist(), self.result[0])
+        self.assertEqual(cached[1:], self.result[1:])
+        self.assertEqual((self.memo.hits, self.memo.misses), (1, 1))
+
+        # Results persist across instances
+        memo = OptimizationMemo(self.memo.path)
+        self.assertEqual(memo.get(key)[0].tolist(), self.result[0])
+        memo.close()
+
+    def test_key_depends_on_inputs(self):
+        key = memo_key("2010-01-01", "2010-12-31", ["GOOG"], "v1", {"method": "SLSQP"})
+        self.assertEqual(key, memo_key("2010-01-01", "2010-12-31", ["GOOG"], "v1", {"method": "SLSQP"}))
+        self.assertNotEqual(key, memo_key("2010-01-01", "2010-12-31", ["GOOG"], "v2", {"method": "SLSQP"}))
+        self.assertNotEqual(key, memo_key("2010-01-01", "2010-12-31", ["GOOG"], "v1", {"method": "SLSQP", "n_starts": 8}))
+
+    def test_key_normalizes_dates(self):
+        key = memo_key("2010-01-01", "2010-12-31", ["GOOG"], "v1", {"method": "SLSQP"})
+        self.assertEqual(key, memo_key(dt.datetime(2010, 1, 1), dt.date(2010, 12, 31), ["GOOG"], "v1", {"method": "SLSQP"}))
+        self.assertEqual(key, memo_key(pd.Timestamp("2010-01-01"), "2010-12-31", ["GOOG"], "v1", {"method": "SLSQP"}))
+
+    def test_data_version_changes_on_append(self):
+        for symbol in ["SPY", "GOOG"]:
+            with open(os.path.join(self.tmpdir, symbol + ".csv"), "w") as f:
+                f.write("Date,Adj Close\n2010-01-04,100.0\n")
+        version = data_version(["GOOG"], base_dir=self.tmpdir)
+        self.assertEqual(version, data_version(["GOOG"], base_dir=self.tmpdir))
+        with open(os.path.join(self.tmpdir, "GOOG.csv"), "a") as f:
+            f.write("2010-01-05,101.0\n")
+        self.assertNotEqual(version, data_version(["GOOG"], base_dir=self.tmpdir))
+
+    def test_eviction_and_invalidation(self):
+        for i, syms in enumerate([["GOOG"], ["AAPL"], ["GLD", "XOM"], ["XOM"]]):
+            self.memo.put("key{}".format(i), syms, self.result)
+            self.memo.get("key0")  # keep key0 recently used
+        self.assertEqual(len(self.memo), 3)
+        self.assertIsNone(self.memo.get("key1"))
+        self.assertIsNotNone(self.memo.get("key0"))
+
+        self.memo.invalidate(["XOM"])
+        self.assertEqual(len(self.memo), 1)
+        self.memo.invalidate()
+        self.assertEqual(len(self.memo), 0)
+
+    def test_invalidation_matches_symbols_exactly(self):
+        self.memo.put("key0", ["BRK_B"], self.result)
+        self.memo.put("key1", ["BRKXB"], self.result)
+        self.memo.put("key2", ["brk_b"], self.result)
+        self.memo.invalidate(["BRK_B"])
+        self.assertIsNone(self.memo.get("key0"))
+        self.assertIsNotNone(self.memo.get("key1"))
+        self.assertIsNotNone(self.memo.get("key2"))
+
+
+if __name__ == '__main__':
+    unittest.main()
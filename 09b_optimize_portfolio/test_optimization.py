@@ -3,6 +3,8 @@
 
 import datetime as dt
 from optimization import *
+from optimization import _project_simplex, _negative_sharpe_ratio_batch
+from marketdata.testing import make_prices
 import unittest
 import math
 
@@ -41,5 +43,102 @@ class TestOptimizePortfolio(unittest.TestCase):
         self.assertTrue(math.isclose(sr, 2.00401501102, rel_tol=0.02), "Sharpe ratio is incorrect")
     
 
+class TestMultiStart(unittest.TestCase):
+
+    def setUp(self):
+        self.prices = make_prices(250, ["GOOG", "AAPL", "GLD", "XOM"])
+        self.syms = list(self.prices.columns)
+
+    def test_multistart_matches_single_start(self):
+        allocs, diagnostics = find_optimal_allocations_multistart(self.prices, get_negative_sharpe_ratio, self.syms, \
+            n_starts=6, n_workers=2, patience=6)
+        reference = find_optimal_allocations(self.prices, get_negative_sharpe_ratio, self.syms)
+
+        self.assertTrue(math.isclose(sum(allocs), 1.0, rel_tol=0.02))
+        self.assertTrue(diagnostics['fun'] <= get_negative_sharpe_ratio(reference, self.prices) + 1e-6)
+        self.assertTrue(math.isclose(diagnostics['fun'], get_negative_sharpe_ratio(allocs, self.prices), rel_tol=1e-9))
+        self.assertEqual(diagnostics['n_completed'] + diagnostics['n_failed'] + diagnostics['n_cancelled'], 6)
+
+    def test_multistart_stops_early(self):
+        allocs, diagnostics = find_optimal_allocations_multistart(self.prices, get_negative_sharpe_ratio, self.syms, \
+            n_starts=64, n_workers=1, patience=2)
+        self.assertTrue(diagnostics['converged'])
+        self.assertTrue(diagnostics['n_cancelled'] > 0)
+
+
+class TestMeanVariance(unittest.TestCase):
+
+    def setUp(self):
+        self.syms = ["S{}".format(i) for i in range(20)]
+        self.prices = make_prices(500, self.syms, seed=1)
+
+    def test_gradient(self):
+        mean, cov = estimate_moments(self.prices, "ledoit_wolf")
+        allocs = np.random.RandomState(0).dirichlet(np.ones(len(self.syms)))
+        self.assertTrue(spo.check_grad(get_negative_sharpe_ratio_mv, get_negative_sharpe_ratio_mv_jac, \
+            allocs, mean, cov) < 1e-4)
+
+    def test_matches_path_objective(self):
+        # Without rebalancing costs the two objectives differ only by weight drift
+        allocs = find_optimal_allocations_mv(self.prices, self.syms)
+        reference = find_optimal_allocations(self.prices, get_negative_sharpe_ratio, self.syms)
+        self.assertTrue(math.isclose(sum(allocs), 1.0, rel_tol=1e-6))
+        self.assertTrue(allocs.min() >= -1e-6)
+        self.assertTrue(math.isclose(get_negative_sharpe_ratio(allocs, self.prices), \
+            get_negative_sharpe_ratio(reference, self.prices), rel_tol=0.1))
+
+        # No random allocation beats the optimum of the mean-variance objective
+        mean, cov = estimate_moments(self.prices)
+        best = get_negative_sharpe_ratio_mv(allocs, mean, cov)
+        for guess in np.random.RandomState(0).dirichlet(np.ones(len(self.syms)), size=200):
+            self.assertTrue(best <= get_negative_sharpe_ratio_mv(guess, mean, cov) + 1e-9)
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        universe = ["S{}".format(i) for i in range(20)]
+        self.prices_list = [make_prices(rng.randint(100, 400), list(rng.choice(universe, rng.randint(2, 10), replace=False)), \
+            seed=k) for k in range(12)]
+
+    def test_project_simplex(self):
+        values = np.array([[0.5, 0.8, -0.2, 3.0], [0.1, 0.2, 0.3, 0.4]])
+        mask = np.array([[True, True, True, False], [True, True, True, True]])
+        projected = _project_simplex(values, mask)
+        self.assertTrue(np.allclose(projected.sum(axis=1), 1.0))
+        self.assertTrue(np.allclose(projected[0], [0.35, 0.65, 0.0, 0.0]))
+        self.assertTrue(np.allclose(projected[1], values[1]))
+
+    def test_gradient(self):
+        prices = self.prices_list[0]
+        norm_prices = (prices.values / prices.values[0])[np.newaxis]
+        return_mask = np.ones((1, len(prices) - 1))
+        allocs = np.random.RandomState(0).dirichlet(np.ones(prices.shape[1]))
+        fun = lambda x: _negative_sharpe_ratio_batch(x[np.newaxis], norm_prices, return_mask, 0.0001, 252)[0][0]
+        jac = lambda x: _negative_sharpe_ratio_batch(x[np.newaxis], norm_prices, return_mask, 0.0001, 252)[1][0]
+        self.assertTrue(spo.check_grad(fun, jac, allocs) < 1e-4)
+        self.assertTrue(math.isclose(fun(allocs), get_negative_sharpe_ratio(allocs, prices, rfr=0.0001), rel_tol=1e-9))
+
+    def test_matches_slsqp(self):
+        allocs, diagnostics = find_optimal_allocations_batch(self.prices_list, batch_size=5)
+        self.assertEqual(len(allocs), len(self.prices_list))
+        for k, prices in enumerate(self.prices_list):
+            reference = find_optimal_allocations(prices, get_negative_sharpe_ratio, list(prices.columns))
+            self.assertEqual(len(allocs[k]), prices.shape[1])
+            self.assertTrue(math.isclose(sum(allocs[k]), 1.0, rel_tol=1e-5))
+            self.assertTrue(allocs[k].min() >= 0)
+            self.assertTrue(np.allclose(allocs[k], reference, atol=0.01))
+            self.assertTrue(math.isclose(diagnostics['fun'][k], get_negative_sharpe_ratio(allocs[k], prices), rel_tol=1e-4))
+            self.assertTrue(get_negative_sharpe_ratio(allocs[k], prices) <= get_negative_sharpe_ratio(reference, prices) + 1e-5)
+
+    def test_stalled_is_not_converged(self):
+        # With tol=0 no step is small enough to converge: a solve ends by stalling or at max_iter
+        allocs, diagnostics = find_optimal_allocations_batch(self.prices_list, max_iter=2000, tol=0.0)
+        self.assertFalse(diagnostics['converged'].any())
+        self.assertTrue(diagnostics['stalled'].any())
+        self.assertTrue(np.array_equal(diagnostics['stalled'], diagnostics['n_iter'] < 2000))
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""Test for service.py"""
+
+
+import asyncio
+from service import *
+from marketdata.testing import make_prices
+import unittest
+import math
+
+
+class CountingLoader(object):
+    """Synthetic price loader that counts how often it is called"""
+
+    def __init__(self, missing=False):
+        self.calls = 0
+        self.missing = missing
+
+    def __call__(self, symbols, dates):
+        self.calls += 1
+        prices = make_prices(n_days=len(dates))
+        prices.index = dates
+        if self.missing:
+            prices.iloc[10, 1] = np.nan
+        return prices
+
+
+async def request(port, method, path, body=None):
+    """Send one HTTP request to the service and return (status, decoded JSON response)"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write("{} {} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {}\r\nConnection: close\r\n\r\n".format( \
+        method, path, len(payload)).encode() + payload)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line == b"\r\n":
+            break
+        name, _, value = line.decode().partition(":")
+        headers[name.strip().lower()] = value.strip()
+    response = json.loads(await reader.readexactly(int(headers["content-length"])))
+    writer.close()
+    return status, response
+
+
+class TestAnalyticsService(unittest.TestCase):
+
+    def run_service(self, scenario, **kwargs):
+        async def run():
+            service = await AnalyticsService(loader=self.loader, n_workers=1, **kwargs).start()
+            try:
+                return await scenario(service)
+            finally:
+                await service.close()
+        return asyncio.run(run())
+
+    def setUp(self):
+        self.loader = CountingLoader()
+        self.prices = self.loader(["GOOG"], pd.date_range("2010-01-01", "2010-12-31"))
+        self.loader.calls = 0
+
+    def test_concurrent_assessments_are_batched(self):
+        allocs = [[0.25, 0.25, 0.25, 0.25], [0.1, 0.2, 0.3, 0.4], [0.4, 0.3, 0.2, 0.1]]
+        syms = ["GOOG", "AAPL", "GLD", "XOM"]
+
+        async def scenario(service):
+            responses = await asyncio.gather(*[request(service.port, "POST", "/assess", \
+                {"sd": "2010-01-01", "ed": "2010-12-31", "syms": syms, "allocs": a, "rfr": 0.0001}) for a in allocs])
+            return responses, service.stats
+
+        responses, stats = self.run_service(scenario, batch_window=0.05)
+        self.assertEqual(self.loader.calls, 1)
+        self.assertEqual(stats["batches"], 1)
+        for a, (status, result) in zip(allocs, responses):
+            self.assertEqual(status, 200)
+            port_val = get_portfolio_value(self.prices[syms], a, 1000000)
+            cr, adr, sddr, sr = get_portfolio_stats(port_val, 0.0001, 252)
+            self.assertTrue(math.isclose(result["cr"], cr, rel_tol=1e-9))
+            self.assertTrue(math.isclose(result["sddr"], sddr, rel_tol=1e-9))
+            self.assertTrue(math.isclose(result["sr"], sr, rel_tol=1e-9))
+            self.assertTrue(math.isclose(result["ev"], port_val.iloc[-1, 0], rel_tol=1e-9))
+
+    def test_optimize(self):
+        syms = ["GOOG", "AAPL", "GLD", "XOM"]
+
+        async def scenario(service):
+            body = {"sd": "2010-01-01", "ed": "2010-12-31", "syms": syms}
+            responses = await asyncio.gather(request(service.port, "POST", "/optimize", body), \
+                request(service.port, "POST", "/optimize", body))
+            return responses + [await request(service.port, "GET", "/health")]
+
+        (status, result), (status_again, result_again), (status_health, health) = self.run_service(scenario)
+        self.assertEqual(status, 200)
+        self.assertEqual(result, result_again)
+        self.assertEqual(health["price_loads"], 1)
+        reference = find_optimal_allocations(self.prices[syms], get_negative_sharpe_ratio, syms)
+        self.assertTrue(np.allclose(result["allocs"], reference, atol=1e-6))
+
+    def test_errors(self):
+        async def scenario(service):
+            return await asyncio.gather(request(service.port, "GET", "/nowhere"), \
+                request(service.port, "POST", "/assess", {"sd": "2010-01-01", "ed": "2010-12-31", "syms": ["GOOG"], "allocs": [0.5, 0.5]}))
+
+        (status_missing, _), (status_bad, response) = self.run_service(scenario)
+        self.assertEqual(status_missing, 404)
+        self.assertEqual(status_bad, 400)
+        self.assertIn("error", response)
+
+    def test_missing_prices_are_filled(self):
+        self.loader = CountingLoader(missing=True)
+        syms = ["GOOG", "AAPL"]
+
+        async def scenario(service):
+            return await request(service.port, "POST", "/assess", \
+                {"sd": "2010-01-01", "ed": "2010-12-31", "syms": syms, "allocs": [0.5, 0.5]})
+
+        status, result = self.run_service(scenario)
+        self.assertEqual(status, 200)
+        prices = self.loader(syms, pd.date_range("2010-01-01", "2010-12-31"))
+        with self.assertRaises(ValueError):
+            assess_group(prices, [{"syms": syms, "allocs": [0.5, 0.5], "sv": 1000000, "rfr": 0.0, "sf": 252}])
+        port_val = get_portfolio_value(prices[syms].ffill().bfill(), [0.5, 0.5], 1000000)
+        self.assertTrue(math.isclose(result["sr"], get_portfolio_stats(port_val, 0.0, 252)[3], rel_tol=1e-9))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,2 @@
+"""pytest configuration: pytest puts this directory on sys.path, so marketdata and util import
+without an install when the tests are collected from the repository root"""
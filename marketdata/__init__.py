@@ -0,0 +1,13 @@
+"""Data access for stock prices: one place to configure where and how prices are loaded.
+
+Scripts import loaders from here, so a faster backend set with set_backend, e.g.
+set_backend(CachedBackend(BinaryBackend(store_dir))), applies to all of them at once.
+"""
+
+from marketdata.config import get_data_root, set_data_root
+from marketdata.backends import symbol_to_path, symbol_to_store_path, CSVBackend, BinaryBackend, \
+    CachedBackend, get_backend, set_backend
+from marketdata.loaders import OHLCV_FIELDS, get_data, get_fields, write_binary_store, normalize_data, \
+    compute_daily_returns
+from marketdata.plotting import plot_data, downsample, ChartRenderer
+from marketdata.return_index import ReturnIndex
@@ -0,0 +1,129 @@
+"""Storage backends that read the price history of one symbol.
+
+A backend has a read(symbol, fields) method returning a dataframe indexed by date with one
+column per field. The loaders use the default backend unless they are given another one.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from marketdata.config import get_data_root
+
+
+def symbol_to_path(symbol, base_dir=None):
+    """Return CSV file path given ticker symbol."""
+    return os.path.join(base_dir or get_data_root(), "{}.csv".format(str(symbol)))
+
+
+def symbol_to_store_path(symbol, store_dir):
+    """Return the binary store directory given ticker symbol."""
+    return os.path.join(store_dir, str(symbol))
+
+
+class CSVBackend(object):
+    """Read Yahoo Finance style CSV files, parsing only the requested columns"""
+
+    def __init__(self, base_dir=None):
+        self.base_dir = base_dir
+
+    def read(self, symbol, fields):
+        fields = list(fields)
+        return pd.read_csv(symbol_to_path(symbol, self.base_dir), index_col='Date',
+                parse_dates=True, usecols=['Date'] + fields, na_values=['nan'])[fields]
+
+    def read_all(self, symbol):
+        """Read every column, sorted by date"""
+        return pd.read_csv(symbol_to_path(symbol, self.base_dir), index_col='Date',
+                parse_dates=True, na_values=['nan']).sort_index()
+
+
+class BinaryBackend(object):
+    """
+    Read a binary store of one .npy file per column, memory-mapped, so no text is parsed
+    Symbols missing from the store are read from the fallback backend (CSV by default).
+    """
+
+    def __init__(self, store_dir, fallback=None):
+        self.store_dir = store_dir
+        self.fallback = fallback if fallback is not None else CSVBackend()
+
+    def read(self, symbol, fields):
+        fields = list(fields)
+        path = symbol_to_store_path(symbol, self.store_dir)
+        if not os.path.isdir(path):
+            return self.fallback.read(symbol, fields)
+        index = pd.DatetimeIndex(np.load(os.path.join(path, "Date.npy")))
+        columns = [np.load(os.path.join(path, "{}.npy".format(field)), mmap_mode='r') for field in fields]
+        return pd.DataFrame(dict(zip(fields, columns)), index=index, columns=fields)
+
+    def read_all(self, symbol):
+        return self.fallback.read_all(symbol)
+
+    def write(self, symbols, source=None):
+        """Convert symbols from the source backend (CSV by default) into the store
+
+        Rewrite a symbol after its source data changes.
+        """
+        source = source if source is not None else self.fallback
+        for symbol in symbols:
+            df = source.read_all(symbol)
+            path = symbol_to_store_path(symbol, self.store_dir)
+            if not os.path.isdir(path):
+                os.makedirs(path)
+            np.save(os.path.join(path, "Date.npy"), df.index.values.astype('datetime64[ns]'))
+            for field in df.columns:
+                np.save(os.path.join(path, "{}.npy".format(field)), df[field].values.astype(np.float64))
+
+
+class CachedBackend(object):
+    """
+    Keep recently read symbols in memory in front of another backend
+    Callers receive the cached dataframes and must not modify them in place.
+    """
+
+    def __init__(self, backend=None, max_entries=512):
+        self.backend = backend if backend is not None else CSVBackend()
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def read(self, symbol, fields):
+        key = (symbol, tuple(fields))
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        df = self.backend.read(symbol, fields)
+        with self._lock:
+            self._cache[key] = df
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return df
+
+    def read_all(self, symbol):
+        return self.backend.read_all(symbol)
+
+    def clear(self, symbols=None):
+        """Forget cached data of the symbols, or of every symbol; call it after data is appended or corrected"""
+        with self._lock:
+            if symbols is None:
+                self._cache.clear()
+            else:
+                for key in [k for k in self._cache if k[0] in symbols]:
+                    del self._cache[key]
+
+
+_default_backend = CSVBackend()
+
+
+def get_backend():
+    """Return the backend the loaders use by default"""
+    return _default_backend
+
+
+def set_backend(backend):
+    """Make every loader read through backend by default, e.g. CachedBackend(BinaryBackend(store_dir))"""
+    global _default_backend
+    _default_backend = backend
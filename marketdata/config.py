@@ -0,0 +1,19 @@
+"""Where price data is read from."""
+
+import os
+
+# The data directory sits one level above the repository (see README)
+DEFAULT_DATA_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data")
+
+_data_root = os.environ.get("MARKETDATA_ROOT", DEFAULT_DATA_ROOT)
+
+
+def get_data_root():
+    """Return the directory of the CSV files, $MARKETDATA_ROOT if set"""
+    return _data_root
+
+
+def set_data_root(path):
+    """Read CSV files from path from now on"""
+    global _data_root
+    _data_root = path
@@ -0,0 +1,90 @@
+"""Load price data for many symbols, aligned on a date index."""
+
+import numpy as np
+import pandas as pd
+from marketdata.backends import BinaryBackend, CSVBackend, get_backend
+
+OHLCV_FIELDS = ["Open", "High", "Low", "Close", "Volume", "Adj Close"]
+
+
+def get_data(symbols, dates, addSPY=True, colname='Adj Close', backend=None):
+    """Read stock data (adjusted close) for given symbols.
+
+    SPY is added for reference if absent, and dates SPY did not trade are dropped.
+    The symbols list passed in is not modified.
+    """
+    backend = backend if backend is not None else get_backend()
+    if addSPY and 'SPY' not in symbols:  # add SPY for reference, if absent
+        symbols = ['SPY'] + list(symbols)
+
+    dates = pd.DatetimeIndex(dates)
+    columns = {}
+    for symbol in symbols:
+        columns[symbol] = backend.read(symbol, [colname])[colname].reindex(dates)
+    df = pd.DataFrame(columns, index=dates, columns=list(symbols))
+    if 'SPY' in symbols:  # drop dates SPY did not trade
+        df = df.dropna(subset=['SPY'])
+
+    return df
+
+
+def get_fields(symbols, dates, fields=("Adj Close",), addSPY=True, base_dir=None, store_dir=None, \
+    as_array=False, backend=None):
+    """
+    Read several OHLCV fields for given symbols in one pass, reading only the requested columns
+    Parameters:
+    symbols: list of symbols
+    dates: date index to align the data to; dates SPY did not trade are dropped when SPY is included
+    fields: subset of OHLCV_FIELDS
+    addSPY: add SPY for reference, if absent
+    base_dir: directory of the CSV files, defaults to the data root
+    store_dir: directory of a binary store (see BinaryBackend); symbols found there are read
+    from memory-mapped column files instead of parsing CSV
+    as_array: return a numpy array instead of a dataframe
+    backend: backend to read from, instead of base_dir/store_dir or the default backend
+    Returns:
+    A dataframe indexed by date with (field, symbol) MultiIndex columns, or if as_array is True,
+    a tuple (data, dates, symbols) where data has shape (len(fields), len(dates), len(symbols))
+    """
+    if backend is None:
+        if base_dir is None and store_dir is None:
+            backend = get_backend()
+        else:
+            backend = CSVBackend(base_dir)
+            if store_dir is not None:
+                backend = BinaryBackend(store_dir, fallback=backend)
+    fields = list(fields)
+    if addSPY and 'SPY' not in symbols:  # add SPY for reference, if absent
+        symbols = ['SPY'] + list(symbols)
+    dates = pd.DatetimeIndex(dates)
+
+    data = np.full((len(fields), len(dates), len(symbols)), np.nan)
+    for j, symbol in enumerate(symbols):
+        df_temp = backend.read(symbol, fields)
+        data[:, :, j] = df_temp.reindex(dates).values.T
+        if symbol == 'SPY':  # drop dates SPY did not trade
+            traded = dates.isin(df_temp.index)
+    if 'SPY' in symbols:
+        data, dates = data[:, traded, :], dates[traded]
+
+    if as_array:
+        return data, dates, list(symbols)
+    columns = pd.MultiIndex.from_product([fields, symbols])
+    return pd.DataFrame(data.transpose(1, 0, 2).reshape(len(dates), -1), index=dates, columns=columns)
+
+
+def write_binary_store(symbols, store_dir, base_dir=None):
+    """Convert CSV files to a binary store of one .npy file per column, see BinaryBackend"""
+    BinaryBackend(store_dir, fallback=CSVBackend(base_dir)).write(symbols)
+
+
+def normalize_data(df):
+    """Normalize stock prices using the first row of the dataframe"""
+    return df/df.iloc[0,:]
+
+
+def compute_daily_returns(df):
+    """Compute and return the daily return values"""
+    daily_returns = df.pct_change()
+    daily_returns.iloc[0,:] = 0
+    return daily_returns
@@ -0,0 +1,118 @@
+"""Plot price data."""
+
+import threading
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from concurrent.futures import ProcessPoolExecutor, wait
+
+
+def plot_data(df, title="Stock prices", xlabel="Date", ylabel="Price", renderer=None, path="plot.png"):
+    """Plot stock prices with a custom title and meaningful axis labels.
+
+    With a ChartRenderer, the chart is written to path in the background instead of being shown,
+    and the Future of the written path is returned.
+    """
+    if renderer is not None:
+        return renderer.submit(df, path, title=title, xlabel=xlabel, ylabel=ylabel)
+    ax = df.plot(title=title, fontsize=12)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    plt.show()
+
+
+def downsample(df, max_points=2000):
+    """Reduce a long series to about max_points rows for plotting
+
+    The rows are split into max_points / 2 buckets and the minimum and maximum of every column are
+    kept in each bucket, so spikes and drawdowns stay visible; the first and last rows are kept too.
+    """
+    n_rows = len(df)
+    if n_rows <= max_points:
+        return df
+    n_buckets = max(1, max_points // 2)
+    bucket_size = -(-n_rows // n_buckets)
+
+    # Pad to whole buckets with NaN, which nanargmin and nanargmax skip
+    values = np.full((n_buckets * bucket_size, df.shape[1]), np.nan)
+    values[:n_rows] = np.asarray(df.values, dtype=np.float64)
+    buckets = values.reshape(n_buckets, bucket_size, -1)
+    filled = ~np.isnan(buckets).all(axis=1)
+    buckets = np.where(filled[:, np.newaxis, :], buckets, 0)
+    starts = (np.arange(n_buckets) * bucket_size)[:, np.newaxis]
+    keep = np.concatenate([[0, n_rows - 1], (starts + np.nanargmin(buckets, axis=1))[filled], \
+        (starts + np.nanargmax(buckets, axis=1))[filled]])
+    return df.iloc[np.unique(keep[keep < n_rows])]
+
+
+class ChartRenderer(object):
+    """
+    Render charts to PNG files in a pool of worker processes with the Agg backend
+    submit() downsamples the data and returns at once with a Future of the written path, so
+    analytics are not blocked by plotting; queued charts are rendered in parallel. Finished charts
+    are dropped from pending, and failed ones are kept in failed until wait() reports them.
+    Use as a context manager, or call close() to wait for the pending charts and stop the workers.
+    Parameters:
+    n_workers: Number of worker processes
+    max_points: Series longer than this are downsampled before they are sent to a worker
+    dpi: Resolution of the PNG files
+    """
+
+    def __init__(self, n_workers=2, max_points=2000, dpi=100):
+        self.max_points = max_points
+        self.dpi = dpi
+        self.pending = set()
+        self.failed = []
+        self._lock = threading.Lock()
+        self._executor = ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker)
+
+    def submit(self, df, path, title="Stock prices", xlabel="Date", ylabel="Price"):
+        """Queue one chart of the columns of df; returns a Future of path"""
+        chart = dict(df=downsample(df, self.max_points), path=path, title=title, xlabel=xlabel, \
+            ylabel=ylabel, dpi=self.dpi)
+        future = self._executor.submit(render_chart, chart)
+        with self._lock:
+            self.pending.add(future)
+        future.add_done_callback(self._finished)
+        return future
+
+    def wait(self):
+        """Wait for every queued chart; raises the first rendering error since the last wait()"""
+        with self._lock:
+            pending = list(self.pending)
+        wait(pending)
+        with self._lock:
+            failed, self.failed = self.failed, []
+        if failed:
+            failed[0].result()
+
+    def _finished(self, future):
+        with self._lock:
+            self.pending.discard(future)
+            if not future.cancelled() and future.exception() is not None:
+                self.failed.append(future)
+
+    def close(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def render_chart(chart):
+    """Worker task: write a chart to its path and return the path"""
+    # A standalone Figure keeps no pyplot state between charts
+    fig = Figure()
+    ax = fig.subplots()
+    chart["df"].plot(ax=ax, title=chart["title"], fontsize=12)
+    ax.set_xlabel(chart["xlabel"])
+    ax.set_ylabel(chart["ylabel"])
+    fig.savefig(chart["path"], dpi=chart["dpi"])
+    return chart["path"]
+
+
+def _init_worker():
+    plt.switch_backend("Agg")
@@ -0,0 +1,185 @@
+"""Prefix sums of daily returns, so return statistics over any date window take two lookups."""
+
+import numpy as np
+import pandas as pd
+
+
+class ReturnIndex(object):
+    """
+    Running sums of daily returns over a trading calendar, built once when prices are ingested
+    For every day t the index keeps the cumulative log return since the first day, the sum of the
+    returns up to t and the sum of their squares (and, with cross=True, of the products of every pair
+    of symbols). The statistics of a window [sd, ed] are the difference of the sums at its two ends,
+    so they cost O(N) per symbol, or O(N^2) per portfolio, whatever the length of the window.
+    Parameters:
+    prices: filled adjusted closing prices, one column per symbol, e.g. from get_data
+    cross: if True, keep the sums of products needed by portfolio_stats. They take days x N x N
+        float64 values, e.g. 8 bytes x 2520 days x 500 symbols^2 = 5 GB for ten years of 500 symbols,
+        against days x N for the other sums, so they are off by default
+    """
+
+    def __init__(self, prices, cross=False):
+        values = np.asarray(prices.values, dtype=np.float64)
+        if len(values) == 0:
+            raise ValueError("Cannot index an empty price panel")
+        self.symbols = list(prices.columns)
+        self.cross = cross
+        # Sums are kept around the mean return of the first load, which keeps the sums of squares small
+        returns = values[1:] / values[:-1] - 1
+        self._shift = returns.mean(axis=0) if len(returns) else np.zeros(len(self.symbols))
+
+        n_symbols = len(self.symbols)
+        self._dates = np.empty(0, dtype="datetime64[ns]")
+        self._log_growth = np.empty((0, n_symbols))
+        self._sum = np.empty((0, n_symbols))
+        self._sum_sq = np.empty((0, n_symbols))
+        self._sum_cross = np.empty((0, n_symbols, n_symbols)) if cross else None
+        self._n_days = 0
+        self._last_prices = None
+        self._extend(prices.index, values)
+
+    def __len__(self):
+        return self._n_days
+
+    @property
+    def dates(self):
+        return pd.DatetimeIndex(self._dates[:self._n_days])
+
+    def append(self, prices):
+        """Extend the index with new days of prices, which must come after the last indexed date"""
+        prices = prices[self.symbols]
+        if len(prices) == 0:
+            return
+        if pd.Timestamp(prices.index[0]) <= self.dates[-1]:
+            raise ValueError("Appended prices must start after {}".format(self.dates[-1].date()))
+        self._extend(prices.index, np.asarray(prices.values, dtype=np.float64))
+
+    def window(self, sd, ed):
+        """Return the positions of the first and last trading days in [sd, ed]"""
+        dates = self._dates[:self._n_days]
+        start = np.searchsorted(dates, np.datetime64(pd.Timestamp(sd)), side="left")
+        end = np.searchsorted(dates, np.datetime64(pd.Timestamp(ed)), side="right") - 1
+        if end - start < 2:
+            raise ValueError("The window {} to {} has fewer than 3 trading days".format(sd, ed))
+        return start, end
+
+    def symbol_stats(self, sd, ed, daily_rf=0.0, samples_per_year=252):
+        """
+        Statistics of every symbol over [sd, ed], like get_portfolio_stats of a one-symbol portfolio
+        Returns:
+        stats: dataframe indexed by symbol with columns cr, adr, sddr and sr
+        """
+        start, end = self.window(sd, ed)
+        n = end - start
+        cr = np.expm1(self._log_growth[end] - self._log_growth[start])
+        d1 = self._sum[end] - self._sum[start]
+        d2 = self._sum_sq[end] - self._sum_sq[start]
+        adr = self._shift + d1 / n
+        sddr = np.sqrt(np.maximum(d2 - d1 * d1 / n, 0) / (n - 1))
+        sr = np.sqrt(samples_per_year) * (adr - daily_rf) / sddr
+        return pd.DataFrame({"cr": cr, "adr": adr, "sddr": sddr, "sr": sr}, index=self.symbols)
+
+    def portfolio_stats(self, sd, ed, syms, allocs, daily_rf=0.0, samples_per_year=252):
+        """
+        Statistics of a portfolio over [sd, ed] from the sums at the ends of the window
+        The cumulative return is exact for a buy-and-hold portfolio, as in assess_portfolio. The mean
+        and standard deviation of daily return are those of a portfolio kept at the fixed weights allocs,
+        i.e. rebalanced daily; they are close to buy-and-hold ones over windows of modest drift.
+        Needs an index built with cross=True.
+        Parameters:
+        sd, ed: start and end dates of the window
+        syms: symbols of the portfolio
+        allocs: allocations, shape (len(syms),) for one portfolio or (K, len(syms)) for K portfolios
+        daily_rf: daily risk free rate
+        samples_per_year: sampling frequency per year
+        Returns:
+        cr, adr, sddr, sr: each a float for a single portfolio or an array of shape (K,) otherwise.
+            cr is buy-and-hold while adr, sddr and sr are daily rebalanced, so sr does not match the
+            Sharpe ratio of assess_portfolio on long windows, where buy-and-hold weights drift
+        """
+        if not self.cross:
+            raise ValueError("portfolio_stats needs an index built with cross=True")
+        start, end = self.window(sd, ed)
+        n = end - start
+        columns = [self.symbols.index(s) for s in syms]
+        weights = np.atleast_2d(np.asarray(allocs, dtype=np.float64))
+
+        growth = np.exp(self._log_growth[end, columns] - self._log_growth[start, columns])
+        cr = np.dot(weights, growth) / weights.sum(axis=1) - 1
+        d1 = np.dot(weights, self._sum[end, columns] - self._sum[start, columns])
+        d2_matrix = self._sum_cross[end][np.ix_(columns, columns)] - self._sum_cross[start][np.ix_(columns, columns)]
+        d2 = np.einsum("ki,ij,kj->k", weights, d2_matrix, weights)
+        adr = np.dot(weights, self._shift[columns]) + d1 / n
+        sddr = np.sqrt(np.maximum(d2 - d1 * d1 / n, 0) / (n - 1))
+        sr = np.sqrt(samples_per_year) * (adr - daily_rf) / sddr
+
+        results = (cr, adr, sddr, sr)
+        if np.ndim(allocs) == 1:
+            return tuple(r.item() for r in results)
+        return results
+
+    def save(self, path):
+        """Write the index to an .npz file"""
+        n = self._n_days
+        arrays = {"symbols": np.array(self.symbols), "dates": self._dates[:n], "shift": self._shift, \
+            "log_growth": self._log_growth[:n], "sum": self._sum[:n], "sum_sq": self._sum_sq[:n], \
+            "last_prices": self._last_prices}
+        if self.cross:
+            arrays["sum_cross"] = self._sum_cross[:n]
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save"""
+        with np.load(path) as data:
+            index = cls.__new__(cls)
+            index.symbols = [str(s) for s in data["symbols"]]
+            index.cross = "sum_cross" in data
+            index._dates = data["dates"]
+            index._shift = data["shift"]
+            index._log_growth = data["log_growth"]
+            index._sum = data["sum"]
+            index._sum_sq = data["sum_sq"]
+            index._sum_cross = data["sum_cross"] if index.cross else None
+            index._last_prices = data["last_prices"]
+            index._n_days = len(index._dates)
+        return index
+
+    def _extend(self, dates, values):
+        """Add the running sums of new days; buffers grow by doubling so appends are amortized O(1)"""
+        if np.isnan(values).any():
+            raise ValueError("Prices must be filled before indexing (see fill_missing_values)")
+        previous = np.vstack([values[:1] if self._last_prices is None else self._last_prices[np.newaxis], values])
+        returns = previous[1:] / previous[:-1] - 1
+        centered = returns - self._shift
+        if self._last_prices is None:
+            # The first day has no return; every sum starts at zero
+            centered[0] = 0
+        first, n_new = self._n_days, len(values)
+        self._reserve(first + n_new)
+
+        def accumulate(buffer, increments):
+            start = buffer[first - 1] if first else 0
+            buffer[first:first + n_new] = start + np.cumsum(increments, axis=0)
+
+        self._dates[first:first + n_new] = np.asarray(pd.DatetimeIndex(dates), dtype="datetime64[ns]")
+        accumulate(self._log_growth, np.log1p(returns))
+        accumulate(self._sum, centered)
+        accumulate(self._sum_sq, centered * centered)
+        if self.cross:
+            accumulate(self._sum_cross, centered[:, :, np.newaxis] * centered[:, np.newaxis, :])
+        self._n_days += n_new
+        self._last_prices = values[-1].copy()
+
+    def _reserve(self, n_days):
+        capacity = len(self._dates)
+        if n_days <= capacity:
+            return
+        capacity = max(n_days, 2 * capacity)
+        for name in ["_dates", "_log_growth", "_sum", "_sum_sq", "_sum_cross"]:
+            buffer = getattr(self, name)
+            if buffer is not None:
+                grown = np.empty((capacity,) + buffer.shape[1:], dtype=buffer.dtype)
+                grown[:self._n_days] = buffer[:self._n_days]
+                setattr(self, name, grown)
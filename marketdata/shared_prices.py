@@ -0,0 +1,109 @@
+"""Share a loaded price panel with worker processes through shared memory."""
+
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+
+# Segments mapped by this process, by name: [SharedMemory, DataFrame view, reference count]
+_attached = {}
+
+
+class SharedPrices(object):
+    """
+    A price panel published once into a named shared-memory segment
+    The publishing process owns the segment: it is unlinked when the last reference is released.
+    Workers receive the small, picklable `handle` and call attach_prices(handle) to get a
+    DataFrame backed by the same memory, so no prices are parsed or pickled per worker.
+    """
+
+    def __init__(self, prices):
+        values = np.ascontiguousarray(prices.values, dtype=np.float64)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        view = np.ndarray(values.shape, dtype=values.dtype, buffer=self._shm.buf)
+        view[:] = values
+        self.handle = {'name': self._shm.name, 'shape': values.shape, 'dtype': values.dtype.str, \
+            'index': prices.index, 'columns': list(prices.columns)}
+        self.prices = pd.DataFrame(view, index=prices.index, columns=prices.columns, copy=False)
+        self._refcount = 1
+        _attached[self._shm.name] = [self._shm, self.prices, 1]
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def retain(self):
+        """Add a reference to the segment"""
+        if self._refcount <= 0:
+            raise ValueError("Shared prices {} were already released".format(self.name))
+        self._refcount += 1
+        return self
+
+    def release(self):
+        """Drop a reference to the segment, unlinking it when no references are left"""
+        if self._refcount <= 0:
+            return
+        self._refcount -= 1
+        if self._refcount == 0:
+            _attached.pop(self.name, None)
+            self.prices = None
+            self._shm.unlink()
+            _close(self._shm)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def publish_prices(prices):
+    """Copy a price dataframe into a new shared-memory segment and return its SharedPrices owner"""
+    return SharedPrices(prices)
+
+
+def attach_prices(handle):
+    """
+    Return a zero-copy dataframe over the shared prices described by handle
+    Repeated calls in the same process reuse the existing mapping and add a reference;
+    balance each call with detach_prices(handle).
+    """
+    entry = _attached.get(handle['name'])
+    if entry is None:
+        shm = shared_memory.SharedMemory(name=handle['name'])
+        values = np.ndarray(handle['shape'], dtype=np.dtype(handle['dtype']), buffer=shm.buf)
+        prices = pd.DataFrame(values, index=handle['index'], columns=handle['columns'], copy=False)
+        entry = _attached[handle['name']] = [shm, prices, 0]
+    entry[2] += 1
+    return entry[1]
+
+
+def detach_prices(handle):
+    """Drop a reference taken by attach_prices, unmapping the segment when no references are left"""
+    entry = _attached.get(handle['name'])
+    if entry is None:
+        return
+    entry[2] -= 1
+    if entry[2] <= 0:
+        del _attached[handle['name']]
+        _close(entry[0])
+
+
+def init_worker(handle):
+    """Process pool initializer that attaches a worker to the shared prices once, at startup"""
+    attach_prices(handle)
+
+
+def get_shared_prices(handle):
+    """Return the shared prices already attached in this process, attaching them if needed"""
+    entry = _attached.get(handle['name'])
+    if entry is None:
+        return attach_prices(handle)
+    return entry[1]
+
+
+def _close(shm):
+    try:
+        shm.close()
+    except BufferError:
+        # Views of the buffer are still alive, the mapping is freed once they are collected
+        pass
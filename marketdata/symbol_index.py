@@ -0,0 +1,133 @@
+"""Per-symbol summary index, so universe screens do not have to re-read price files."""
+
+import json
+import os
+import pandas as pd
+from marketdata.backends import symbol_to_path
+from marketdata.config import get_data_root
+
+INDEX_FILE = "symbol_index.json"
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Adj Close"]
+
+
+def index_path(base_dir=None):
+    """Return the path of the index file for a data directory"""
+    return os.path.join(base_dir or get_data_root(), INDEX_FILE)
+
+
+def summarize_symbol(symbol, base_dir=None):
+    """Read one CSV file and return its summary: row count, date range, volume, price ranges and missing values"""
+    path = symbol_to_path(symbol, base_dir)
+    df = pd.read_csv(path, parse_dates=["Date"], na_values=["nan"])
+    stat = os.stat(path)
+
+    summary = {"rows": len(df), "mtime": stat.st_mtime, "size": stat.st_size,
+        "first_date": df["Date"].min().date().isoformat() if len(df) else None,
+        "last_date": df["Date"].max().date().isoformat() if len(df) else None,
+        "missing": {c: int(df[c].isnull().sum()) for c in df.columns if c != "Date"}}
+    if "Volume" in df:
+        summary["volume_sum"] = float(df["Volume"].sum())
+        summary["volume_count"] = int(df["Volume"].count())
+        summary["mean_volume"] = summary["volume_sum"] / summary["volume_count"] if summary["volume_count"] else None
+    for c in PRICE_COLUMNS:
+        if c in df:
+            summary["min_" + c] = _float_or_none(df[c].min())
+            summary["max_" + c] = _float_or_none(df[c].max())
+    return summary
+
+
+def load_symbol_index(base_dir=None):
+    """Load the index of a data directory, or return an empty index if it was never built"""
+    try:
+        with open(index_path(base_dir)) as f:
+            return json.load(f)
+    except (IOError, OSError):
+        return {}
+
+
+def save_symbol_index(index, base_dir=None):
+    """Write the index next to the data, replacing the previous one atomically"""
+    path = index_path(base_dir)
+    with open(path + ".tmp", "w") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def update_symbol_index(symbols=None, base_dir=None):
+    """
+    Build or incrementally update the index of a data directory
+    Only CSV files that are new or whose size or modification time changed are read again;
+    symbols whose files were removed are dropped. Call this after ingesting or correcting data.
+    Parameters:
+    symbols: symbols to refresh, defaults to every CSV file in base_dir
+    base_dir: data directory, defaults to the data root
+    Returns:
+    index: dict of symbol -> summary
+    """
+    base_dir = base_dir or get_data_root()
+    index = load_symbol_index(base_dir)
+    changed = False
+    if symbols is None:
+        symbols = [f[:-4] for f in os.listdir(base_dir) if f.endswith(".csv")]
+        for symbol in set(index) - set(symbols):
+            del index[symbol]
+            changed = True
+
+    for symbol in symbols:
+        path = symbol_to_path(symbol, base_dir)
+        if not os.path.exists(path):
+            changed = index.pop(symbol, None) is not None or changed
+            continue
+        stat = os.stat(path)
+        entry = index.get(symbol)
+        if entry is None or entry["mtime"] != stat.st_mtime or entry["size"] != stat.st_size:
+            index[symbol] = summarize_symbol(symbol, base_dir)
+            changed = True
+
+    if changed or not os.path.exists(index_path(base_dir)):
+        save_symbol_index(index, base_dir)
+    return index
+
+
+def screen_symbols(index, min_mean_volume=None, max_mean_volume=None, start=None, end=None, \
+    min_rows=None, max_missing=None, min_price=None, max_price=None, price_column="Adj Close"):
+
+    """
+    Return the sorted symbols of the index that pass every given filter, without reading price files
+    Parameters:
+    index: dict of symbol -> summary, as returned by update_symbol_index
+    min_mean_volume, max_mean_volume: bounds of the mean daily volume
+    start, end: dates the data must cover, i.e. first_date <= start and last_date >= end
+    min_rows: minimum number of rows
+    max_missing: maximum number of missing values in price_column
+    min_price, max_price: bounds that the minimum and maximum of price_column must stay within
+    price_column: price column used by max_missing, min_price and max_price
+    """
+    start = pd.Timestamp(start).date().isoformat() if start is not None else None
+    end = pd.Timestamp(end).date().isoformat() if end is not None else None
+
+    selected = []
+    for symbol, s in index.items():
+        mean_volume = s.get("mean_volume")
+        if min_mean_volume is not None and (mean_volume is None or mean_volume < min_mean_volume):
+            continue
+        if max_mean_volume is not None and (mean_volume is None or mean_volume > max_mean_volume):
+            continue
+        if start is not None and (s["first_date"] is None or s["first_date"] > start):
+            continue
+        if end is not None and (s["last_date"] is None or s["last_date"] < end):
+            continue
+        if min_rows is not None and s["rows"] < min_rows:
+            continue
+        if max_missing is not None and s["missing"].get(price_column, 0) > max_missing:
+            continue
+        if min_price is not None and (s.get("min_" + price_column) is None or s["min_" + price_column] < min_price):
+            continue
+        if max_price is not None and (s.get("max_" + price_column) is None or s["max_" + price_column] > max_price):
+            continue
+        selected.append(symbol)
+    return sorted(selected)
+
+
+def _float_or_none(value):
+    return None if pd.isnull(value) else float(value)
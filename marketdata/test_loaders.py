@@ -0,0 +1,101 @@
+"""Test for loaders.py"""
+
+
+import os
+import shutil
+import tempfile
+from marketdata.loaders import *
+from marketdata.backends import *
+from marketdata.config import get_data_root, set_data_root
+from marketdata.testing import write_csv
+import unittest
+
+
+class CountingBackend(CSVBackend):
+    """CSV backend that counts the files it reads"""
+
+    def __init__(self, base_dir):
+        CSVBackend.__init__(self, base_dir)
+        self.reads = 0
+
+    def read(self, symbol, fields):
+        self.reads += 1
+        return CSVBackend.read(self, symbol, fields)
+
+
+class TestGetData(unittest.TestCase):
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        write_csv(self.base_dir, "SPY", 300, 1000000)
+        write_csv(self.base_dir, "IBM", 200, 50000, start="2010-03-01")
+        self.dates = pd.date_range("2010-01-01", "2010-12-31")
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir)
+
+    def test_get_data(self):
+        symbols = ["IBM"]
+        df = get_data(symbols, self.dates, backend=CSVBackend(self.base_dir))
+        self.assertEqual(symbols, ["IBM"])
+        self.assertEqual(list(df.columns), ["SPY", "IBM"])
+        self.assertEqual(len(df), 261)  # business days of 2010
+        self.assertTrue(df["IBM"].isnull().any())
+
+    def test_data_root(self):
+        root = get_data_root()
+        try:
+            set_data_root(self.base_dir)
+            df = get_data(["IBM"], self.dates)
+        finally:
+            set_data_root(root)
+        self.assertTrue(df.equals(get_data(["IBM"], self.dates, backend=CSVBackend(self.base_dir))))
+
+    def test_cached_backend(self):
+        counting = CountingBackend(self.base_dir)
+        backend = CachedBackend(counting)
+        first = get_data(["IBM"], self.dates, backend=backend)
+        second = get_data(["IBM"], self.dates, backend=backend)
+        self.assertTrue(first.equals(second))
+        self.assertEqual(counting.reads, 2)
+        backend.clear(["IBM"])
+        get_data(["IBM"], self.dates, backend=backend)
+        self.assertEqual(counting.reads, 3)
+
+
+class TestGetFields(unittest.TestCase):
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        write_csv(self.base_dir, "SPY", 300, 1000000)
+        write_csv(self.base_dir, "IBM", 200, 50000, start="2010-03-01", missing=2)
+        self.dates = pd.date_range("2010-01-01", "2010-12-31")
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir)
+
+    def test_matches_csv_columns(self):
+        df = get_fields(["IBM"], self.dates, fields=["High", "Volume", "Adj Close"], base_dir=self.base_dir)
+        self.assertEqual(list(df.columns), [(f, s) for f in ["High", "Volume", "Adj Close"] for s in ["SPY", "IBM"]])
+
+        # Same rows and values as reading each file on its own
+        for field in ["High", "Volume", "Adj Close"]:
+            for symbol in ["SPY", "IBM"]:
+                raw = pd.read_csv(symbol_to_path(symbol, self.base_dir), index_col="Date", parse_dates=True)[field]
+                spy = pd.read_csv(symbol_to_path("SPY", self.base_dir), index_col="Date", parse_dates=True)
+                expected = raw.reindex(spy.index.intersection(self.dates).sort_values())
+                self.assertTrue(np.allclose(df[(field, symbol)].values, expected.values, equal_nan=True))
+
+    def test_binary_store(self):
+        store_dir = os.path.join(self.base_dir, "store")
+        write_binary_store(["SPY", "IBM"], store_dir, base_dir=self.base_dir)
+        from_csv, dates_csv, symbols = get_fields(["IBM"], self.dates, fields=OHLCV_FIELDS, base_dir=self.base_dir, as_array=True)
+        from_store, dates_store, symbols = get_fields(["IBM"], self.dates, fields=OHLCV_FIELDS, base_dir=self.base_dir, \
+            store_dir=store_dir, as_array=True)
+        self.assertEqual(from_store.shape, (len(OHLCV_FIELDS), len(dates_csv), 2))
+        self.assertTrue(dates_store.equals(dates_csv))
+        self.assertTrue(np.allclose(from_store, from_csv, equal_nan=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
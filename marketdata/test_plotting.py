@@ -0,0 +1,61 @@
+"""Test for plotting.py"""
+
+
+import os
+import shutil
+import tempfile
+import pandas as pd
+from marketdata.plotting import *
+import unittest
+
+
+class TestPlotting(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        rng = np.random.RandomState(0)
+        dates = pd.date_range("1990-01-01", periods=10000, freq="B")
+        self.df = pd.DataFrame(100 * np.cumprod(1 + rng.normal(0, 0.01, (10000, 2)), axis=0), \
+            index=dates, columns=["Portfolio", "SPY"])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_downsample(self):
+        small = downsample(self.df, max_points=500)
+        self.assertTrue(len(small) <= 2 * 500 + 2)
+        self.assertTrue(small.index.is_monotonic_increasing)
+        # Extremes and end points are kept
+        for column in self.df.columns:
+            self.assertEqual(small[column].max(), self.df[column].max())
+            self.assertEqual(small[column].min(), self.df[column].min())
+        self.assertEqual(small.index[0], self.df.index[0])
+        self.assertEqual(small.index[-1], self.df.index[-1])
+        short = self.df.iloc[:100]
+        self.assertIs(downsample(short, max_points=500), short)
+
+    def test_renderer(self):
+        paths = [os.path.join(self.tmpdir, "chart{}.png".format(i)) for i in range(4)]
+        with ChartRenderer(n_workers=2, max_points=500) as renderer:
+            future = plot_data(self.df, title="Daily portfolio and SPY", renderer=renderer, path=paths[0])
+            for path in paths[1:]:
+                renderer.submit(self.df, path)
+            renderer.wait()
+            self.assertEqual(len(renderer.pending), 0)
+        self.assertEqual(future.result(), paths[0])
+        for path in paths:
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(8), b"\x89PNG\r\n\x1a\n")
+
+    def test_renderer_error(self):
+        with ChartRenderer(n_workers=1) as renderer:
+            future = renderer.submit(self.df, os.path.join(self.tmpdir, "missing", "chart.png"))
+            with self.assertRaises(Exception):
+                future.result()
+            with self.assertRaises(Exception):
+                renderer.wait()
+            renderer.wait()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""Test for return_index.py"""
+
+
+import os
+import shutil
+import tempfile
+from marketdata.return_index import *
+from marketdata.testing import make_prices
+import unittest
+import math
+
+
+class TestReturnIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.prices = make_prices()
+        self.index = ReturnIndex(self.prices, cross=True)
+        self.sd, self.ed = "2010-06-15", "2011-09-30"
+        self.window = self.prices.loc[self.sd:self.ed]
+
+    def test_symbol_stats(self):
+        stats = self.index.symbol_stats(self.sd, self.ed, daily_rf=0.0001)
+        returns = self.window.pct_change().iloc[1:]
+        self.assertTrue(np.allclose(stats["cr"], self.window.iloc[-1] / self.window.iloc[0] - 1, rtol=1e-12))
+        self.assertTrue(np.allclose(stats["adr"], returns.mean(), rtol=1e-10))
+        self.assertTrue(np.allclose(stats["sddr"], returns.std(), rtol=1e-10))
+        self.assertTrue(np.allclose(stats["sr"], np.sqrt(252) * (returns.mean() - 0.0001) / returns.std(), rtol=1e-10))
+
+    def test_portfolio_stats(self):
+        syms, allocs = ["GOOG", "GLD", "XOM"], [0.2, 0.5, 0.3]
+        cr, adr, sddr, sr = self.index.portfolio_stats(self.sd, self.ed, syms, allocs)
+
+        # Buy-and-hold cumulative return, as in assess_portfolio
+        port_val = (self.window[syms] / self.window[syms].iloc[0] * allocs).sum(axis=1)
+        self.assertTrue(math.isclose(cr, port_val.iloc[-1] / port_val.iloc[0] - 1, rel_tol=1e-12))
+
+        # Daily return statistics of the fixed-weight portfolio
+        returns = self.window[syms].pct_change().iloc[1:].dot(allocs)
+        self.assertTrue(math.isclose(adr, returns.mean(), rel_tol=1e-10))
+        self.assertTrue(math.isclose(sddr, returns.std(), rel_tol=1e-10))
+        self.assertTrue(math.isclose(sr, np.sqrt(252) * returns.mean() / returns.std(), rel_tol=1e-10))
+
+        # Many portfolios at once
+        batch = self.index.portfolio_stats(self.sd, self.ed, syms, [allocs, [1.0, 0.0, 0.0]])
+        self.assertTrue(np.allclose([r[0] for r in batch], [cr, adr, sddr, sr]))
+        self.assertTrue(math.isclose(batch[3][1], self.index.symbol_stats(self.sd, self.ed)["sr"]["GOOG"], rel_tol=1e-10))
+
+    def test_portfolio_stats_needs_cross(self):
+        with self.assertRaises(ValueError):
+            ReturnIndex(self.prices).portfolio_stats(self.sd, self.ed, ["GOOG", "GLD"], [0.5, 0.5])
+
+    def test_append(self):
+        index = ReturnIndex(self.prices.iloc[:300])
+        for start in range(300, len(self.prices), 100):
+            index.append(self.prices.iloc[start:start + 100])
+        self.assertEqual(len(index), len(self.prices))
+        self.assertTrue(np.allclose(index.symbol_stats(self.sd, self.ed), self.index.symbol_stats(self.sd, self.ed), rtol=1e-10))
+        with self.assertRaises(ValueError):
+            index.append(self.prices.iloc[-5:])
+
+    def test_save_load(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, "return_index.npz")
+            self.index.save(path)
+            index = ReturnIndex.load(path)
+        finally:
+            shutil.rmtree(tmpdir)
+        self.assertEqual(index.symbols, self.index.symbols)
+        self.assertTrue(index.dates.equals(self.index.dates))
+        index.append(make_prices(900).iloc[800:])
+        self.assertTrue(np.allclose(index.portfolio_stats(self.sd, self.ed, ["SPY", "XOM"], [0.5, 0.5]), \
+            self.index.portfolio_stats(self.sd, self.ed, ["SPY", "XOM"], [0.5, 0.5])))
+
+
+if __name__ == '__main__':
+    unittest.main()
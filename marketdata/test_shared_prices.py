@@ -0,0 +1,48 @@
+"""Test for shared_prices.py"""
+
+
+from concurrent.futures import ProcessPoolExecutor
+from marketdata.shared_prices import *
+import unittest
+
+
+def sum_shared_prices(handle):
+    """Worker task: sum the prices and report whether they are backed by shared memory"""
+    prices = get_shared_prices(handle)
+    return float(prices.values.sum()), prices.values.flags['OWNDATA']
+
+
+class TestSharedPrices(unittest.TestCase):
+
+    def setUp(self):
+        dates = pd.date_range("2010-01-01", periods=100, freq="B")
+        self.prices = pd.DataFrame(np.random.RandomState(0).rand(100, 3), index=dates, columns=["SPY", "GLD", "XOM"])
+
+    def test_workers_attach_same_data(self):
+        with publish_prices(self.prices) as shared:
+            with ProcessPoolExecutor(max_workers=2, initializer=init_worker, initargs=(shared.handle,)) as executor:
+                results = list(executor.map(sum_shared_prices, [shared.handle] * 4))
+        for total, owndata in results:
+            self.assertAlmostEqual(total, self.prices.values.sum())
+            self.assertFalse(owndata)
+
+    def test_attach_is_zero_copy_and_reference_counted(self):
+        shared = publish_prices(self.prices)
+        view = attach_prices(shared.handle)
+        self.assertTrue(view.equals(self.prices))
+        shared.prices.iloc[0, 0] = -1.0
+        self.assertEqual(view.iloc[0, 0], -1.0)
+        detach_prices(shared.handle)
+        del view
+
+        shared.retain()
+        shared.release()
+        self.assertIsNotNone(shared.prices)
+        shared.release()
+        self.assertIsNone(shared.prices)
+        with self.assertRaises(FileNotFoundError):
+            attach_prices(shared.handle)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+"""Test for symbol_index.py"""
+
+
+import shutil
+import tempfile
+import time
+import numpy as np
+from marketdata.symbol_index import *
+from marketdata.testing import write_csv
+import unittest
+
+
+class TestSymbolIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        write_csv(self.base_dir, "SPY", 500, 1000000)
+        write_csv(self.base_dir, "IBM", 250, 50000, missing=3)
+        write_csv(self.base_dir, "NEW", 100, 2000, start="2011-01-01")
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir)
+
+    def test_summary(self):
+        index = update_symbol_index(base_dir=self.base_dir)
+        self.assertEqual(sorted(index), ["IBM", "NEW", "SPY"])
+        ibm = index["IBM"]
+        self.assertEqual(ibm["rows"], 250)
+        self.assertEqual(ibm["first_date"], "2010-01-01")
+        self.assertEqual(ibm["mean_volume"], 50000)
+        self.assertEqual(ibm["missing"]["Adj Close"], 3)
+        self.assertEqual(ibm["max_High"], 21)
+        self.assertEqual(load_symbol_index(self.base_dir), index)
+
+    def test_screen(self):
+        index = update_symbol_index(base_dir=self.base_dir)
+        self.assertEqual(screen_symbols(index, min_mean_volume=10000), ["IBM", "SPY"])
+        self.assertEqual(screen_symbols(index, start="2010-06-01", end="2011-01-31"), ["SPY"])
+        self.assertEqual(screen_symbols(index, max_missing=0), ["NEW", "SPY"])
+        self.assertEqual(screen_symbols(index, min_rows=200, max_price=15), [])
+
+    def test_incremental_update(self):
+        update_symbol_index(base_dir=self.base_dir)
+        mtime = os.stat(index_path(self.base_dir)).st_mtime_ns
+        index = update_symbol_index(base_dir=self.base_dir)
+        self.assertEqual(os.stat(index_path(self.base_dir)).st_mtime_ns, mtime)
+
+        time.sleep(0.01)
+        write_csv(self.base_dir, "IBM", 300, 70000)
+        os.remove(symbol_to_path("NEW", self.base_dir))
+        index = update_symbol_index(base_dir=self.base_dir)
+        self.assertEqual(sorted(index), ["IBM", "SPY"])
+        self.assertEqual(index["IBM"]["rows"], 300)
+        self.assertEqual(index["IBM"]["mean_volume"], 70000)
+
+    def test_deletion_is_saved(self):
+        update_symbol_index(base_dir=self.base_dir)
+        os.remove(symbol_to_path("IBM", self.base_dir))
+        self.assertEqual(sorted(update_symbol_index(base_dir=self.base_dir)), ["NEW", "SPY"])
+        self.assertEqual(sorted(load_symbol_index(self.base_dir)), ["NEW", "SPY"])
+
+
+if __name__ == '__main__':
+    unittest.main()
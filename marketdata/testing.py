@@ -0,0 +1,24 @@
+"""Synthetic price data for the tests of marketdata and of the scripts that use it."""
+
+import numpy as np
+import pandas as pd
+from marketdata.backends import symbol_to_path
+
+
+def make_prices(n_days=800, syms=("SPY", "GOOG", "AAPL", "GLD", "XOM"), seed=0):
+    """Generate a random walk of adjusted closing prices"""
+    rng = np.random.RandomState(seed)
+    returns = rng.normal(0.0005, 0.015, (n_days, len(syms)))
+    returns[0, :] = 0
+    dates = pd.date_range("2010-01-01", periods=n_days, freq="B")
+    return pd.DataFrame(100 * np.cumprod(1 + returns, axis=0), index=dates, columns=list(syms))
+
+
+def write_csv(base_dir, symbol, n_days, volume, start="2010-01-01", missing=0):
+    """Write a price file in the Yahoo Finance layout, newest date first"""
+    dates = pd.date_range(start, periods=n_days, freq="B")[::-1]
+    prices = np.linspace(10, 20, n_days)
+    df = pd.DataFrame({"Date": dates.strftime("%Y-%m-%d"), "Open": prices, "High": prices + 1, "Low": prices - 1,
+        "Close": prices, "Volume": volume, "Adj Close": prices})
+    df.loc[:missing - 1, "Adj Close"] = np.nan
+    df.to_csv(symbol_to_path(symbol, base_dir), index=False)
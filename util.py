@@ -1,41 +1,9 @@
 """Utility code."""
 
-import os
-import pandas as pd
-import matplotlib.pyplot as plt
-
-def symbol_to_path(symbol, base_dir=os.path.join("../..", "data")):
-    """Return CSV file path given ticker symbol."""
-    return os.path.join(base_dir, "{}.csv".format(str(symbol)))
-
-
-def get_data(symbols, dates, addSPY=True):
-    """Read stock data (adjusted close) for given symbols from CSV files."""
-    df = pd.DataFrame(index=dates)
-    if addSPY and 'SPY' not in symbols:  # add SPY for reference, if absent
-        symbols = ['SPY'] + symbols
-
-    for symbol in symbols:
-        df_temp = pd.read_csv(symbol_to_path(symbol), index_col='Date',
-                parse_dates=True, usecols=['Date', 'Adj Close'], na_values=['nan'])
-        df_temp = df_temp.rename(columns={'Adj Close': symbol})
-        df = df.join(df_temp)
-        if symbol == 'SPY':  # drop dates SPY did not trade
-            df = df.dropna(subset=["SPY"])
-
-    return df
-
-
-def normalize_data(df):
-    """Normalize stock prices using the first row of the dataframe"""
-    return df/df.iloc[0,:]
-
-
-def compute_daily_returns(df):
-    """Compute and return the daily return values"""
-    daily_returns = df.pct_change()
-    daily_returns.iloc[0,:] = 0
-    return daily_returns
+import numpy as np
+# Data access lives in the marketdata package; re-exported here for scripts that import util
+from marketdata import symbol_to_path, get_data, get_fields, write_binary_store, normalize_data, \
+    compute_daily_returns, plot_data, ChartRenderer, OHLCV_FIELDS
 
 
 def compute_sharpe_ratio(k, avg_return, risk_free_rate, std_return):
@@ -50,11 +18,105 @@ def compute_sharpe_ratio(k, avg_return, risk_free_rate, std_return):
     sharpe_ratio: k * (avg_return - risk_free_rate) / std_return
     """
     return k * (avg_return - risk_free_rate) / std_return
-    
-
-def plot_data(df, title="Stock prices", xlabel="Date", ylabel="Price"):
-    """Plot stock prices with a custom title and meaningful axis labels."""
-    ax = df.plot(title=title, fontsize=12)
-    ax.set_xlabel(xlabel)
-    ax.set_ylabel(ylabel)
-    plt.show()
+
+
+def compute_portfolio_stats(port_vals, daily_rf=0.0, samples_per_year=252):
+    """
+    Compute cumulative return, average and standard deviation of daily return and Sharpe ratio
+    Parameters:
+    port_vals: portfolio values, shape (T,) for one portfolio or (T, K) for K portfolios (also when K == 1)
+    daily_rf: daily risk free rate, a scalar or one value per portfolio
+    samples_per_year: sampling frequency per year, a scalar or one value per portfolio
+    Returns:
+    cr, adr, sddr, sr: each a float for a single portfolio or an array of shape (K,) otherwise
+    """
+    values = np.asarray(port_vals, dtype=np.float64)
+    single = values.ndim == 1
+    values = values.reshape(len(values), -1)
+
+    cr = values[-1] / values[0] - 1
+    returns = values[1:] / values[:-1] - 1
+    adr = returns.mean(axis=0)
+    sddr = returns.std(axis=0, ddof=1)
+    sr = compute_sharpe_ratio(np.sqrt(samples_per_year), adr, daily_rf, sddr)
+
+    results = (cr, adr, sddr, sr)
+    if single:
+        return tuple(np.asarray(r).item() for r in results)
+    return results
+
+
+def compute_risk_metrics(port_vals, daily_rf=0.0, samples_per_year=252, alpha=0.95):
+    """
+    Compute downside risk metrics from portfolio values; every metric is derived from one array of
+    returns and one array of running peaks, computed once
+    Parameters:
+    port_vals: portfolio values, shape (T,) for one portfolio or (T, K) for K portfolios
+    daily_rf: daily risk free rate (also used as the Sortino target return)
+    samples_per_year: sampling frequency per year
+    alpha: confidence level of VaR and CVaR, e.g. 0.95
+    Returns:
+    var: historical Value at Risk of one period return, as a positive loss
+    cvar: Conditional VaR (expected shortfall), mean loss beyond VaR
+    mdd: maximum drawdown, as a positive fraction of the running peak
+    mdd_duration: longest number of periods spent below a previous peak
+    sortino: Sortino ratio, annualized with sqrt(samples_per_year)
+    calmar: Calmar ratio, annualized return divided by maximum drawdown
+    Each result is a float for a single portfolio or an array of shape (K,) otherwise.
+    With fewer than two values there are no returns: var, cvar, sortino and calmar are NaN, as
+    get_portfolio_stats gives, and mdd and mdd_duration are 0.
+    """
+    values = np.asarray(port_vals, dtype=np.float64)
+    single = values.ndim == 1
+    values = values.reshape(len(values), -1)
+    n_periods = len(values)
+
+    if n_periods < 2:
+        nan, zero = np.full(values.shape[1], np.nan), np.zeros(values.shape[1])
+        results = (nan, nan, zero, zero.astype(int), nan, nan)
+        if single:
+            return tuple(r.item() for r in results)
+        return results
+
+    returns = values[1:] / values[:-1] - 1
+    peaks = np.maximum.accumulate(values, axis=0)
+
+    # Historical VaR/CVaR: the k worst returns form the tail
+    k = max(1, int(np.ceil((1 - alpha) * len(returns))))
+    tail = np.partition(returns, k - 1, axis=0)[:k]
+    var = -tail.max(axis=0)
+    cvar = -tail.mean(axis=0)
+
+    # Maximum drawdown and the longest time between a peak and its recovery
+    mdd = 1 - (values / peaks).min(axis=0)
+    index = np.arange(n_periods)[:, None]
+    last_peak = np.maximum.accumulate(np.where(values >= peaks, index, 0), axis=0)
+    mdd_duration = (index - last_peak).max(axis=0)
+
+    # Sortino ratio only penalizes returns below the target
+    excess = returns - daily_rf
+    downside_std = np.sqrt(np.mean(np.minimum(excess, 0) ** 2, axis=0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sortino = np.sqrt(samples_per_year) * excess.mean(axis=0) / downside_std
+
+        # Calmar ratio uses the compound annual growth rate
+        annual_return = (values[-1] / values[0]) ** (samples_per_year / (n_periods - 1.0)) - 1
+        calmar = annual_return / mdd
+
+    results = (var, cvar, mdd, mdd_duration, sortino, calmar)
+    if single:
+        return tuple(r.item() for r in results)
+    return results
+
+
+def compute_portfolio_values(norm_prices, allocs, sv):
+    """
+    Compute daily values of K buy-and-hold portfolios over the same prices
+    Parameters:
+    norm_prices: array of shape (T, N), prices normalized to the first day
+    allocs: array of shape (K, N), one row of allocations per portfolio
+    sv: start value, a scalar or an array of shape (K,)
+    Returns:
+    port_vals: array of shape (T, K) with the value of each portfolio for each day
+    """
+    return np.dot(np.asarray(norm_prices, dtype=np.float64), np.asarray(allocs, dtype=np.float64).T) * sv